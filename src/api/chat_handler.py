@@ -1,8 +1,16 @@
+import contextlib
 import os
-from typing import Optional
+import threading
+import zlib
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
 from models.chat_model import TerminacionesChatModel
+from models.message_analyzer import MessageAnalysis
+from api.render_jobs import RenderJobQueue, RenderQueueFull
 from models.design_generator import DesignGenerator
-from models.render_generator import RenderGenerator
+
+if TYPE_CHECKING:
+    # The render stack (torch, PIL, diffusers) loads with the first render
+    from models.render_generator import RenderGenerator
 
 
 class ChatHandler:
@@ -14,19 +22,26 @@ class ChatHandler:
         self.chat_model = TerminacionesChatModel()
 
         # Initialize design and render generators (lazy loading)
-        self.design_generator = None
-        self.render_generator = None
+        self.design_generator: Optional[DesignGenerator] = None
+        self.render_generator: Optional["RenderGenerator"] = None
+        self._generators_lock = threading.Lock()
+
+        # Render jobs run in the background (RENDER_WORKERS, RENDER_QUEUE_SIZE)
+        self.render_jobs = RenderJobQueue(self.render_design)
 
         print("ChatHandler ready")
 
     def process_message(
-        self, message: str, generate_image: bool = False
+        self, message: str, generate_image: bool = False, preview: bool = False
     ) -> dict:
         print(f"\nProcessing message: {message}")
         print(f"Generate image: {generate_image}")
 
+        # Analyze once; the result is shared by every step below
+        analysis = self.chat_model.analyze(message)
+
         # Generate chat response
-        response_data = self.chat_model.generate_response(message)
+        response_data = self.chat_model.generate_response(message, analysis=analysis)
 
         # Simplified response - only return the conversational text
         result = {
@@ -42,89 +57,164 @@ class ChatHandler:
         if generate_image:
             print("Image generation requested...")
 
-            # Check if message contains specification request
-            if self._is_specification_request(message):
-                image_path = self._generate_full_specification(message)
-                if image_path:
-                    result["image_path"] = image_path
+            # Check if message contains specification request; the render
+            # itself runs as a background job the client can poll
+            if self._is_specification_request(message, analysis):
+                try:
+                    job = self.render_jobs.submit(
+                        **self.extract_design_params(message, analysis),
+                        preview=preview,
+                    )
+                    result["render_job_id"] = job.id
+                except RenderQueueFull as e:
+                    print(f"Render not queued: {e}")
 
         return result
 
-    def _is_specification_request(self, message: str) -> bool:
-        spec_keywords = [
-            "especificacion",
-            "specification",
-            "diseño completo",
-            "complete design",
-            "proyecto",
-            "project",
-            "render",
-            "visualizacion",
-            "generar diseño",
-        ]
-
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in spec_keywords)
-
-    def _generate_full_specification(self, message: str) -> Optional[str]:
-        try:
-            # Initialize generators if needed
+    def stream_message(self, message: str) -> Iterator[Dict]:
+        """Stream the chat answer as token events plus a final response event."""
+        print(f"\nStreaming message: {message}")
+
+        analysis = self.chat_model.analyze(message)
+
+        stream = self.chat_model.stream_response(message, analysis=analysis)
+        with contextlib.closing(stream):
+            for event in stream:
+                if event["event"] == "response":
+                    data = event["data"]
+                    event = {
+                        "event": "response",
+                        "data": {
+                            "response": data["response"],
+                            "on_topic": data["on_topic"],
+                        },
+                    }
+                yield event
+
+    def _is_specification_request(
+        self, message: str, analysis: Optional[MessageAnalysis] = None
+    ) -> bool:
+        if analysis is None:
+            analysis = self.chat_model.analyze(message)
+        return analysis.spec_request
+
+    def extract_design_params(
+        self, message: str, analysis: Optional[MessageAnalysis] = None
+    ) -> Dict:
+        if analysis is None:
+            analysis = self.chat_model.analyze(message)
+
+        # Extract parameters from the analysis, with defaults
+        return {
+            "style": analysis.style or "minimalist",
+            "space": analysis.space or "bathroom",
+            "size": "medium",
+            "colors": ["white", "grey"],
+        }
+
+    def submit_render(self, **params) -> dict:
+        return self.render_jobs.submit(**params).to_dict()
+
+    def submit_final_render(self, job_id: str) -> Optional[dict]:
+        """
+        Queue the full render for a finished preview job, reusing its seed
+        and specification. Returns None if the job is unknown.
+        """
+        job = self.render_jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.params.get("preview"):
+            raise ValueError("El render no es una vista previa")
+        if job.status != "done":
+            raise ValueError(f"La vista previa no ha terminado ({job.status})")
+
+        params = {k: v for k, v in job.params.items() if k != "preview"}
+        params["seed"] = job.result["seed"]
+        params["specification"] = job.result["specification"]
+        params["preview_job_id"] = job.id
+        return self.submit_render(**params)
+
+    def get_render_job(self, job_id: str) -> Optional[dict]:
+        job = self.render_jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    def get_design_generator(self) -> DesignGenerator:
+        # Initialized on first use (jobs run on several threads)
+        with self._generators_lock:
             if self.design_generator is None:
                 self.design_generator = DesignGenerator()
+            return self.design_generator
 
+    def get_render_generator(self) -> "RenderGenerator":
+        with self._generators_lock:
             if self.render_generator is None:
-                self.render_generator = RenderGenerator()
+                from models.render_generator import RenderGenerator
 
-            # Extract parameters from message (simple heuristic)
-            # Default values
-            style = "minimalist"
-            space = "bathroom"
-            size = "medium"
-            colors = ["white", "grey"]
-
-            # Try to detect style
-            if "rustic" in message.lower():
-                style = "rustic"
-            elif "industrial" in message.lower():
-                style = "industrial"
-            elif "brutalism" in message.lower():
-                style = "brutalism"
-
-            # Try to detect space
-            if "baño" in message.lower() or "bathroom" in message.lower():
-                space = "bathroom"
-            elif "cocina" in message.lower() or "kitchen" in message.lower():
-                space = "kitchen"
-            elif "sala" in message.lower() or "living" in message.lower():
-                space = "living_room"
-
-            # Generate specification
-            specification = self.design_generator.generate_specification(
+                self.render_generator = RenderGenerator()
+            return self.render_generator
+
+    def render_design(
+        self,
+        style: str,
+        space: str,
+        size: str,
+        colors: list,
+        seed: Optional[int] = None,
+        preview: bool = False,
+        specification: Optional[str] = None,
+        preview_job_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Generate specification + render. Runs on a render worker thread.
+        With preview=True only a quick low-resolution draft is rendered;
+        submit_final_render() then renders it at full size with the same seed.
+        """
+        design_generator = self.get_design_generator()
+        render_generator = self.get_render_generator()
+
+        # Generate specification (a final render reuses its preview's)
+        if specification is None:
+            specification = design_generator.generate_specification(
                 style=style, space=space, size=size, colors=colors
             )
 
-            # Generate render
-            output_dir = os.path.join(
-                os.path.dirname(__file__), "../outputs/chat_renders"
-            )
-            os.makedirs(output_dir, exist_ok=True)
-
-            filename = f"chat_{style}_{space}.png"
-
-            image, render_path = self.render_generator.generate_render(
-                style=style,
-                space=space,
-                specification=specification,
-                colors=colors,
-                output_dir=output_dir,
-                filename=filename,
-            )
-
-            return render_path
+        # Generate render
+        output_dir = os.path.join(os.path.dirname(__file__), "../outputs/chat_renders")
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Same design parameters -> same seed, so repeat requests hit the
+        # render cache; the file name is unique per cache key
+        if seed is None:
+            seed = zlib.crc32(f"{style}|{space}|{size}|{','.join(colors)}".encode())
+
+        render = (
+            render_generator.generate_preview
+            if preview
+            else render_generator.generate_render
+        )
+        image, render_path = render(
+            style=style,
+            space=space,
+            specification=specification,
+            colors=colors,
+            output_dir=output_dir,
+            seed=seed,
+        )[:2]
+
+        return {
+            "image_path": render_path,
+            "specification": specification,
+            "seed": seed,
+            "preview": preview,
+            "render_stats": render_generator.last_render_stats,
+        }
 
-        except Exception as e:
-            print(f"Error generating full specification: {e}")
-            return None
+    def get_cache_stats(self) -> dict:
+        stats = self.chat_model.get_cache_stats()
+        design_generator = self.design_generator
+        if design_generator is not None and design_generator.section_cache is not None:
+            stats["sections"] = design_generator.section_cache.stats()
+        return stats
 
     def get_materials_catalog(self) -> dict:
         return self.chat_model.catalog
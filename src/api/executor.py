@@ -0,0 +1,36 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for blocking model calls.
+    Keeps the asyncio event loop free while FLAN-T5 or Stable Diffusion run,
+    and lets several inferences run in parallel (torch releases the GIL).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        if max_workers is None:
+            max_workers = int(os.environ.get("INFERENCE_WORKERS", "4"))
+
+        self.max_workers = max(max_workers, 1)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference"
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run func in the pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, functools.partial(func, *args, **kwargs)
+        )
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Run func in the pool without waiting for it."""
+        return self._pool.submit(func, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
@@ -1,14 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, AsyncIterator
+import json
 import sys
 import os
+import threading
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from api.chat_handler import ChatHandler
+from api.executor import InferenceExecutor
+from api.render_jobs import RenderQueueFull
+from api.warmup import ModelWarmup
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,11 +35,18 @@ app.add_middleware(
 # Initialize chat handler (singleton)
 chat_handler: Optional[ChatHandler] = None
 
+# Thread pool for blocking inference (size: INFERENCE_WORKERS)
+inference_executor: Optional[InferenceExecutor] = None
+
+# Loads and warms the models in the background (see /health/ready)
+model_warmup: Optional[ModelWarmup] = None
+
 
 # Pydantic models for request/response
 class ChatRequest(BaseModel):
     message: str
     generate_image: bool = False
+    preview: bool = False
 
     class Config:
         json_schema_extra = {
@@ -48,6 +61,7 @@ class ChatResponse(BaseModel):
     response: str
     on_topic: bool
     image_path: Optional[str] = None
+    render_job_id: Optional[str] = None
 
     class Config:
         json_schema_extra = {
@@ -55,22 +69,87 @@ class ChatResponse(BaseModel):
                 "response": "Para un baño moderno, te recomiendo considerar porcelain bathroom tile en tonos white, beige, que tiene un precio de $25-45/m2. Otra excelente alternativa es glass mosaic tiles disponible en multicolor y white, que también funciona muy bien para este tipo de aplicación. Ambas opciones ofrecen buena durabilidad y acabados de calidad.",
                 "on_topic": True,
                 "image_path": None,
+                "render_job_id": None,
+            }
+        }
+
+
+class RenderRequest(BaseModel):
+    message: Optional[str] = None
+    style: Optional[str] = None
+    space: Optional[str] = None
+    size: Optional[str] = None
+    colors: Optional[List[str]] = None
+    seed: Optional[int] = None
+    preview: bool = False
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "style": "minimalist",
+                "space": "bathroom",
+                "size": "medium",
+                "colors": ["white", "grey"],
             }
         }
 
 
+class RenderJobResponse(BaseModel):
+    job_id: str
+    status: str
+    params: Dict
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
 class HealthResponse(BaseModel):
     status: str
     message: str
 
 
+class ModelState(BaseModel):
+    state: str
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    models: Dict[str, ModelState]
+    uptime_seconds: float
+
+
 # Endpoints
 @app.on_event("startup")
 async def startup_event():
-    global chat_handler
+    global inference_executor, model_warmup
     print("Starting Terminaciones Chat API...")
-    chat_handler = ChatHandler()
-    print("API ready!")
+    inference_executor = InferenceExecutor()
+
+    # Accept connections right away; models load and warm up in the
+    # background and /health/ready turns 200 once they are done
+    model_warmup = ModelWarmup(ChatHandler, on_handler=_set_chat_handler)
+    model_warmup.start()
+    print(f"API started ({inference_executor.max_workers} inference workers)")
+
+
+def _set_chat_handler(handler: ChatHandler) -> None:
+    global chat_handler
+    chat_handler = handler
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if inference_executor is not None:
+        inference_executor.shutdown()
+    if chat_handler is not None:
+        chat_handler.render_jobs.shutdown()
+        if chat_handler.design_generator is not None:
+            chat_handler.design_generator.save_section_cache()
 
 
 @app.get("/", response_model=Dict)
@@ -81,9 +160,16 @@ async def root():
         "description": "API especializada en terminaciones arquitectónicas",
         "endpoints": {
             "POST /chat": "Enviar mensaje al chat",
+            "POST /chat/stream": "Enviar mensaje al chat (respuesta en streaming SSE)",
             "GET /health": "Verificar estado del servicio",
+            "GET /health/live": "El proceso está vivo (liveness)",
+            "GET /health/ready": "Modelos cargados y calentados (readiness)",
+            "POST /renders": "Encolar un render (especificación + imagen)",
+            "GET /renders/{job_id}": "Consultar el estado de un render",
+            "POST /renders/{job_id}/final": "Render final de una vista previa (misma semilla)",
             "GET /materials/catalog": "Obtener catálogo completo de materiales",
             "GET /materials/{category}": "Obtener materiales por categoría",
+            "GET /cache/stats": "Estadísticas del caché de respuestas",
         },
         "categories": [
             "bathroom_finishes",
@@ -104,20 +190,43 @@ async def health_check():
     }
 
 
+@app.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def health_ready():
+    if model_warmup is None:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+
+    status = model_warmup.status()
+    if status["status"] != "ready":
+        # Not routable yet: load balancers only look at the status code
+        return JSONResponse(status_code=503, content=status)
+
+    return status
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     if chat_handler is None:
         raise HTTPException(status_code=503, detail="Service not initialized")
 
     try:
-        result = chat_handler.process_message(
-            message=request.message, generate_image=request.generate_image
+        # Run inference off the event loop so other endpoints stay responsive
+        result = await inference_executor.run(
+            chat_handler.process_message,
+            message=request.message,
+            generate_image=request.generate_image,
+            preview=request.preview,
         )
 
         return ChatResponse(
             response=result["response"],
             on_topic=result["on_topic"],
             image_path=result.get("image_path", None),
+            render_job_id=result.get("render_job_id", None),
         )
 
     except Exception as e:
@@ -127,6 +236,126 @@ async def chat(request: ChatRequest):
         )
 
 
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_chat_events(
+    message: str, http_request: Request
+) -> AsyncIterator[str]:
+    # Each step of the blocking generator runs in the inference pool
+    events = chat_handler.stream_message(message)
+    # A generator can't be closed while next() is running on it
+    events_lock = threading.Lock()
+
+    def next_event() -> Optional[Dict]:
+        with events_lock:
+            return next(events, None)
+
+    def close_events() -> None:
+        with events_lock:
+            events.close()
+
+    try:
+        try:
+            while True:
+                if await http_request.is_disconnected():
+                    print("Chat stream client disconnected")
+                    return
+                event = await inference_executor.run(next_event)
+                if event is None:
+                    break
+                yield _sse_event(event["event"], event["data"])
+        except Exception as e:
+            print(f"Error streaming chat message: {e}")
+            yield _sse_event(
+                "error", {"detail": f"Error al procesar el mensaje: {str(e)}"}
+            )
+
+        yield _sse_event("done", {})
+    finally:
+        # Closing the generator also stops the model's generation thread.
+        # Not awaited: on disconnect this task is being cancelled, and a
+        # step may still be running in the pool (the lock waits for it)
+        inference_executor.submit(close_events)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Server-Sent Events: "token" events with the AI intro as it is decoded,
+    a "response" event with the full answer, then "done".
+    """
+    if chat_handler is None:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+
+    return StreamingResponse(
+        _stream_chat_events(request.message, http_request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/renders", response_model=RenderJobResponse, status_code=202)
+async def create_render(request: RenderRequest):
+    if chat_handler is None:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+
+    params = chat_handler.extract_design_params(request.message or "")
+    for field in ("style", "space", "size", "colors"):
+        value = getattr(request, field)
+        if value:
+            params[field] = value
+    if request.seed is not None:
+        params["seed"] = request.seed
+    if request.preview:
+        params["preview"] = True
+
+    try:
+        return chat_handler.submit_render(**params)
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.get("/renders/{job_id}", response_model=RenderJobResponse)
+async def get_render(job_id: str):
+    if chat_handler is None:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+
+    job = chat_handler.get_render_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Render no encontrado")
+
+    return job
+
+
+@app.post("/renders/{job_id}/final", response_model=RenderJobResponse, status_code=202)
+async def create_final_render(job_id: str):
+    """Full-resolution render of a finished preview, with the same seed."""
+    if chat_handler is None:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+
+    try:
+        job = chat_handler.submit_final_render(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Render no encontrado")
+
+    return job
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    if chat_handler is None:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+
+    return chat_handler.get_cache_stats()
+
+
 @app.get("/materials/catalog")
 async def get_materials_catalog():
     if chat_handler is None:
@@ -0,0 +1,131 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class RenderQueueFull(Exception):
+    pass
+
+
+class RenderJob:
+    def __init__(self, params: Dict[str, Any]) -> None:
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RenderJobQueue:
+    """
+    Bounded queue of render jobs drained by a pool of worker threads.
+    Jobs move queued -> running -> done/failed; finished jobs are kept
+    (up to max_jobs) so clients can poll their result.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[..., Dict[str, Any]],
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_jobs: int = 1000,
+    ) -> None:
+        if workers is None:
+            workers = int(os.environ.get("RENDER_WORKERS", "1"))
+        if max_queue is None:
+            max_queue = int(os.environ.get("RENDER_QUEUE_SIZE", "16"))
+
+        self.run_job = run_job
+        self.workers = max(workers, 1)
+        self.max_jobs = max_jobs
+
+        self._queue: "queue.Queue[Optional[RenderJob]]" = queue.Queue(
+            maxsize=max(max_queue, 1)
+        )
+        self._jobs: "OrderedDict[str, RenderJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"render-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, **params: Any) -> RenderJob:
+        job = RenderJob(params)
+
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise RenderQueueFull(
+                    f"Render queue is full ({self._queue.maxsize} jobs pending)"
+                )
+            self._jobs[job.id] = job
+            self._trim()
+
+        print(f"Render job queued: {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[RenderJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.workers, "pending": self._queue.qsize(), **counts}
+
+    def shutdown(self) -> None:
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def _trim(self) -> None:
+        # Forget the oldest finished jobs once max_jobs is exceeded
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status in ("done", "failed"):
+                del self._jobs[job_id]
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = self.run_job(**job.params)
+                job.status = "done"
+            except Exception as e:
+                print(f"Render job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Representative chat messages (bathroom, paint, flooring, pool) run once
+# after loading so the first user request does not pay for kernel setup
+WARMUP_PROMPTS = [
+    "¿Qué cerámica recomiendas para un baño moderno?",
+    "¿Qué pintura uso para una fachada exterior?",
+    "Necesito un piso resistente para cocina",
+    "¿Qué revestimiento sirve para una piscina?",
+]
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+def _require_model(generator: Any) -> None:
+    """
+    The models catch their load errors and fall back to templates; for
+    readiness that still counts as a failed load.
+    """
+    if generator.model is None:
+        raise RuntimeError(generator.load_error or "model not loaded")
+
+
+class ModelWarmup:
+    """
+    Loads the chat handler's models on a background thread and warms them.
+    Each model goes pending -> loading -> warming -> ready (or failed) and
+    records its load and warmup time. The chat model is always loaded; the
+    design generator (WARMUP_DESIGN, default on) and the render pipeline
+    (WARMUP_RENDER, default off) are optional. A model that fell back to
+    templates because FLAN-T5 did not load is failed, not ready.
+    """
+
+    def __init__(
+        self,
+        build_handler: Callable[[], Any],
+        on_handler: Optional[Callable[[Any], None]] = None,
+        prompts: Optional[List[str]] = None,
+        warm_design: Optional[bool] = None,
+        warm_render: Optional[bool] = None,
+    ) -> None:
+        if warm_design is None:
+            warm_design = _env_flag("WARMUP_DESIGN", "1")
+        if warm_render is None:
+            warm_render = _env_flag("WARMUP_RENDER", "0")
+
+        self.build_handler = build_handler
+        self.on_handler = on_handler
+        self.prompts = WARMUP_PROMPTS if prompts is None else prompts
+        self.handler: Any = None
+
+        models = ["chat_model"]
+        if warm_design:
+            models.append("design_generator")
+        if warm_render:
+            models.append("render_generator")
+
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, Any]] = {
+            name: {
+                "state": "pending",
+                "load_seconds": None,
+                "warmup_seconds": None,
+                "error": None,
+            }
+            for name in models
+        }
+        self._started_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._started_at = time.time()
+        self._thread = threading.Thread(
+            target=self._run, name="model-warmup", daemon=True
+        )
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(m["state"] == "ready" for m in self._models.values())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {name: dict(state) for name, state in self._models.items()}
+
+        states = {m["state"] for m in models.values()}
+        if states == {"ready"}:
+            status = "ready"
+        elif "failed" in states:
+            status = "failed"
+        else:
+            status = "loading"
+
+        return {
+            "status": status,
+            "models": models,
+            "uptime_seconds": (
+                round(time.time() - self._started_at, 3) if self._started_at else 0.0
+            ),
+        }
+
+    def _set(self, name: str, **fields: Any) -> None:
+        with self._lock:
+            self._models[name].update(fields)
+
+    def _run(self) -> None:
+        def load_handler() -> None:
+            self.handler = self.build_handler()
+            if self.on_handler is not None:
+                self.on_handler(self.handler)
+            _require_model(self.handler.chat_model)
+
+        def warm_chat() -> None:
+            for prompt in self.prompts:
+                self.handler.chat_model.generate_response(prompt)
+
+        self._step("chat_model", load_handler, warm_chat)
+        if self.handler is None:
+            # Nothing else can load without the handler
+            for name in self._models:
+                if name != "chat_model":
+                    self._set(name, state="failed", error="chat model failed")
+            return
+
+        if "design_generator" in self._models:
+            self._step(
+                "design_generator",
+                lambda: _require_model(self.handler.get_design_generator()),
+                lambda: self.handler.design_generator.generate_specification(
+                    style="minimalist", space="facade", size="medium", colors=["white"]
+                ),
+            )
+
+        if "render_generator" in self._models:
+            self._step(
+                "render_generator",
+                self.handler.get_render_generator,
+                lambda: self.handler.render_generator.warmup(),
+            )
+
+    def _step(
+        self, name: str, load: Callable[[], Any], warm: Callable[[], Any]
+    ) -> bool:
+        """Load then warm one model, recording state and timings."""
+        try:
+            self._set(name, state="loading")
+            start = time.perf_counter()
+            load()
+            self._set(
+                name,
+                state="warming",
+                load_seconds=round(time.perf_counter() - start, 3),
+            )
+
+            start = time.perf_counter()
+            warm()
+            self._set(
+                name,
+                state="ready",
+                warmup_seconds=round(time.perf_counter() - start, 3),
+            )
+            print(f"{name} ready")
+            return True
+        except Exception as e:
+            print(f"{name} failed to load: {e}")
+            self._set(name, state="failed", error=str(e))
+            return False
@@ -0,0 +1,328 @@
+import csv
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from typing import Dict, List, Optional
+
+BATCH_STATE_FILE = "batch_state.jsonl"
+BATCH_SUMMARY_FILE = "batch_summary.json"
+
+# Specs rendered together in one generate_renders() call
+BATCH_RENDER_SIZE = int(os.environ.get("BATCH_RENDER_SIZE", "4"))
+
+
+def _parse_colors(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(c).strip() for c in value if str(c).strip()]
+    return [c.strip() for c in re.split(r"[,;|]", value or "") if c.strip()]
+
+
+def _item_id(entry: Dict) -> str:
+    if entry.get("id"):
+        return str(entry["id"])
+    raw = (
+        f"{entry['style']}_{entry['space']}_{entry['size']}_{'-'.join(entry['colors'])}"
+    )
+    # Variants of the same design get their own outputs and state records
+    for key, prefix in (("seed", "s"), ("steps", "n"), ("guidance", "g")):
+        if entry.get(key) is not None:
+            raw += f"_{prefix}{entry[key]}"
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", raw)
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    Read a .jsonl or .csv manifest.
+    Each entry needs style, space, size and colors; id, seed, steps and
+    guidance are optional. Ids (given or derived) must be unique.
+    """
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = [row for row in csv.DictReader(f)]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    entries = []
+    seen: Dict[str, int] = {}
+    for line_number, row in enumerate(rows, 1):
+        missing = [k for k in ("style", "space", "size", "colors") if not row.get(k)]
+        if missing:
+            raise ValueError(
+                f"{path}: entry {line_number} is missing {', '.join(missing)}"
+            )
+
+        entry = {
+            "style": row["style"].strip(),
+            "space": row["space"].strip(),
+            "size": row["size"].strip(),
+            "colors": _parse_colors(row["colors"]),
+            "id": row.get("id") or None,
+            "seed": int(row["seed"]) if row.get("seed") not in (None, "") else None,
+            "steps": int(row["steps"]) if row.get("steps") not in (None, "") else None,
+            "guidance": (
+                float(row["guidance"])
+                if row.get("guidance") not in (None, "")
+                else None
+            ),
+        }
+        entry["id"] = _item_id(entry)
+        if entry["id"] in seen:
+            raise ValueError(
+                f"{path}: entry {line_number} has the same id as entry "
+                f"{seen[entry['id']]} ({entry['id']})"
+            )
+        seen[entry["id"]] = line_number
+        entries.append(entry)
+
+    return entries
+
+
+def _load_state(state_path: str) -> Dict[str, Dict]:
+    state: Dict[str, Dict] = {}
+    if not os.path.exists(state_path):
+        return state
+
+    with open(state_path, "r", encoding="utf-8") as f:
+        for line in f:
+            # A crash can leave a truncated last line
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            state[record["id"]] = record
+
+    return state
+
+
+def _render_mode(no_render: bool, preview: bool, highres: Optional[int]) -> str:
+    if no_render:
+        return "spec"
+    if preview:
+        return "preview"
+    if highres:
+        return f"highres-{highres}"
+    return "render"
+
+
+def _is_done(record: Dict, mode: str) -> bool:
+    """Whether a state record already covers what this run would produce."""
+    if record.get("status") != "done":
+        return False
+    if mode == "spec":
+        return True
+    # Records written before render_mode existed
+    done_mode = record.get("render_mode") or (
+        "render" if record.get("render_path") else "spec"
+    )
+    return done_mode == mode
+
+
+def run_batch(
+    manifest_path: str,
+    output_dir: str = "outputs",
+    no_render: bool = False,
+    steps: Optional[int] = None,
+    guidance: float = 7.5,
+    seed: Optional[int] = None,
+    scheduler: Optional[str] = None,
+    memory_budget_mb: Optional[float] = None,
+    height: Optional[int] = None,
+    width: Optional[int] = None,
+    preview: bool = False,
+    highres: Optional[int] = None,
+) -> Dict:
+    """
+    Generate every manifest entry with one DesignGenerator/RenderGenerator.
+    Specs are produced on a background thread ahead of the renders, which
+    go through generate_renders() BATCH_RENDER_SIZE at a time (previews
+    only with preview, one generate_highres() per entry with highres).
+    Progress is appended to batch_state.jsonl so a rerun skips entries
+    already finished in the same render mode, and a batch_summary.json
+    with per-item timings is written at the end.
+    """
+    from models.design_generator import DesignGenerator
+
+    if preview and highres:
+        raise ValueError("batch mode renders either previews or highres, not both")
+    mode = _render_mode(no_render, preview, highres)
+
+    entries = load_manifest(manifest_path)
+
+    spec_dir = os.path.join(output_dir, "specifications")
+    render_dir = os.path.join(output_dir, "renders")
+    os.makedirs(spec_dir, exist_ok=True)
+
+    state_path = os.path.join(output_dir, BATCH_STATE_FILE)
+    state = _load_state(state_path)
+    pending = [e for e in entries if not _is_done(state.get(e["id"], {}), mode)]
+
+    print(
+        f"Manifest: {len(entries)} entries, {len(entries) - len(pending)} already done"
+    )
+
+    batch_start = time.time()
+    design_gen = DesignGenerator() if pending else None
+
+    render_gen = None
+    if not no_render and pending:
+        from models.render_generator import RenderGenerator
+
+        render_gen = RenderGenerator(
+            scheduler=scheduler, memory_budget_mb=memory_budget_mb
+        )
+
+    # Specs are generated ahead of renders; the small queue bounds how far
+    render_batch = 1 if highres else max(BATCH_RENDER_SIZE, 1)
+    specs: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max(render_batch, 2))
+
+    def produce_specs() -> None:
+        for entry in pending:
+            record = {"id": entry["id"], "spec_path": None, "spec_seconds": 0.0}
+            spec_path = os.path.join(spec_dir, f"{entry['id']}.txt")
+            try:
+                if os.path.exists(spec_path):
+                    # Resumed entry: the spec survived the previous run
+                    with open(spec_path, "r", encoding="utf-8") as f:
+                        specification = f.read()
+                else:
+                    start = time.time()
+                    specification = design_gen.generate_specification(
+                        style=entry["style"],
+                        space=entry["space"],
+                        size=entry["size"],
+                        colors=entry["colors"],
+                    )
+                    record["spec_seconds"] = round(time.time() - start, 3)
+                    # Write atomically so a crash never leaves a partial spec
+                    with open(f"{spec_path}.tmp", "w", encoding="utf-8") as f:
+                        f.write(specification)
+                    os.replace(f"{spec_path}.tmp", spec_path)
+                record["spec_path"] = spec_path
+                specs.put({"entry": entry, "record": record, "spec": specification})
+            except Exception as e:
+                record["error"] = str(e)
+                specs.put({"entry": entry, "record": record, "spec": None})
+        specs.put(None)
+
+    producer = threading.Thread(target=produce_specs, name="batch-specs", daemon=True)
+    producer.start()
+
+    def render(items: List[Dict]) -> None:
+        """Render the entries of items, filling in their records."""
+        start = time.time()
+        try:
+            if highres:
+                item = items[0]
+                entry = item["entry"]
+                _, render_path = render_gen.generate_highres(
+                    style=entry["style"],
+                    space=entry["space"],
+                    specification=item["spec"],
+                    colors=entry["colors"],
+                    output_dir=render_dir,
+                    filename=f"{entry['id']}_{highres}px.png",
+                    target_size=highres,
+                    num_inference_steps=entry["steps"] or steps,
+                    guidance_scale=entry["guidance"] or guidance,
+                    seed=item["record"]["seed"],
+                    height=height,
+                    width=width,
+                )
+                results = [(None, render_path)]
+            else:
+                suffix = "_preview" if preview else ""
+                results = render_gen.generate_renders(
+                    [
+                        {
+                            "style": item["entry"]["style"],
+                            "space": item["entry"]["space"],
+                            "specification": item["spec"],
+                            "colors": item["entry"]["colors"],
+                            "filename": f"{item['entry']['id']}{suffix}.png",
+                            "num_inference_steps": item["entry"]["steps"] or steps,
+                            "guidance_scale": item["entry"]["guidance"] or guidance,
+                            "seed": item["record"]["seed"],
+                            "height": height,
+                            "width": width,
+                            "preview": preview,
+                        }
+                        for item in items
+                    ],
+                    output_dir=render_dir,
+                )
+        except Exception as e:
+            for item in items:
+                item["record"]["error"] = str(e)
+            return
+
+        batch_render_seconds = round(time.time() - start, 3)
+        for item, (_, render_path) in zip(items, results):
+            item["record"]["render_path"] = render_path
+            # Wall time of the whole generate_renders() call, shared by the
+            # render_batch entries rendered in it
+            item["record"]["batch_render_seconds"] = batch_render_seconds
+            item["record"]["render_batch"] = len(items)
+            item["record"]["peak_rss_mb"] = render_gen.last_render_stats["peak_rss_mb"]
+
+    with open(state_path, "a", encoding="utf-8") as state_file:
+        done_count = 0
+        finished = False
+        while not finished:
+            # Wait for a full batch of specs (or the end of the manifest)
+            batch = []
+            while len(batch) < render_batch:
+                item = specs.get()
+                if item is None:
+                    finished = True
+                    break
+                done_count += 1
+                print(f"\n[{done_count}/{len(pending)}] {item['entry']['id']}")
+                batch.append(item)
+
+            to_render = [item for item in batch if item["spec"] is not None]
+            if to_render and render_gen is not None:
+                for item in to_render:
+                    # Recorded so a preview can be finished with the same seed
+                    item_seed = item["entry"]["seed"]
+                    if item_seed is None:
+                        item_seed = seed
+                    if item_seed is None:
+                        item_seed = secrets.randbelow(2**31)
+                    item["record"]["seed"] = item_seed
+                render(to_render)
+
+            for item in batch:
+                entry, record = item["entry"], item["record"]
+                record["render_mode"] = mode
+                record["status"] = "failed" if record.get("error") else "done"
+                state[entry["id"]] = record
+                state_file.write(json.dumps(record) + "\n")
+                state_file.flush()
+
+    producer.join()
+    if design_gen is not None:
+        design_gen.save_section_cache()
+
+    items = [state[e["id"]] for e in entries if e["id"] in state]
+    summary = {
+        "manifest": manifest_path,
+        "total": len(entries),
+        "done": sum(1 for r in items if r.get("status") == "done"),
+        "failed": sum(1 for r in items if r.get("status") == "failed"),
+        "elapsed_seconds": round(time.time() - batch_start, 3),
+        "items": items,
+    }
+
+    summary_path = os.path.join(output_dir, BATCH_SUMMARY_FILE)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\nBatch summary saved: {summary_path}")
+    print(f"  Done: {summary['done']} | Failed: {summary['failed']}")
+
+    return summary
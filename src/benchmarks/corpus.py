@@ -0,0 +1,31 @@
+"""Fixed inputs for benchmarks.suite. Changing them invalidates saved baselines."""
+
+SEED = 1234
+
+# Chat questions: on-topic across the catalog categories plus a few
+# off-topic ones, which exercise the early validate_topic exit
+QUESTIONS = [
+    "¿Qué enchape recomiendas para un baño moderno?",
+    "¿Qué pintura uso para exteriores con mucha humedad?",
+    "Necesito un piso para cocina con mucho tráfico",
+    "¿Qué material me sirve para una piscina?",
+    "¿Qué enchape uso en una terraza?",
+    "¿Qué porcelanato queda bien en una sala minimalista?",
+    "¿Cómo elijo pintura lavable para el dormitorio de niños?",
+    "¿Qué piso de madera aguanta mejor la humedad?",
+    "¿Cuál es la capital de Francia?",
+    "Recomiéndame una película para el fin de semana",
+]
+
+# (style, space, size, colors) for generate_specification
+SPEC_CASES = [
+    ("rustic", "facade", "medium", ["grey", "beige"]),
+    ("minimalist", "living_room", "small", ["white"]),
+    ("industrial", "kitchen", "large", ["black", "grey"]),
+]
+
+# (style, space, colors, seed) for generate_render
+RENDER_CASES = [
+    ("rustic", "facade", ["grey", "beige"], SEED),
+    ("minimalist", "living_room", ["white"], SEED + 1),
+]
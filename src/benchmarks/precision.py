@@ -0,0 +1,179 @@
+"""
+Compare FLAN-T5 precision modes (float32, bfloat16, int8) on CPU.
+
+Each mode runs in its own process so peak RSS is measured per mode. Reports
+load time, per-prompt latency, peak RSS and output drift against float32
+(exact matches and mean text similarity, greedy decoding).
+
+    python -m benchmarks.precision
+    python -m benchmarks.precision --modes float32 int8 --repeats 5
+"""
+
+import argparse
+import difflib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# Fixed prompt set: chat intros and spec sections as the app builds them
+PROMPTS = [
+    "Responde brevemente: ¿Qué cerámica recomiendas para un baño moderno?",
+    "Responde brevemente: ¿Qué pintura sirve para una fachada exterior con humedad?",
+    "Responde brevemente: ¿Qué piso es mejor para una cocina con mucho tráfico?",
+    "Responde brevemente: ¿Qué revestimiento uso alrededor de una piscina?",
+    "Describe installation patterns and techniques for rustic style architecture.\n"
+    "Include layout, joint treatment, and special techniques. Be specific and technical.",
+    "List technical requirements for Living Room construction.\n"
+    "Include structural, weather protection, and maintenance needs. Be specific.",
+    "Explain how to use these colors in architectural design: grey, beige.\n"
+    "Describe distribution, balance, and visual impact. Keep it professional.",
+    "Describe the application of Polished Concrete (Concrete) in minimalist architecture.\n"
+    "Focus on texture (smooth), finish (polished), and aesthetic impact.\n"
+    "Keep it concise and technical.",
+]
+
+GENERATE_KWARGS = {"max_length": 120, "num_beams": 1, "do_sample": False}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak RSS of this process in MB, None where it cannot be measured."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil reports the peak working set
+        try:
+            import psutil  # type: ignore[import-not-found]
+        except ImportError:
+            return None
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        return None if peak is None else peak / (1024 * 1024)
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(model_name: str, dtype: str, repeats: int) -> Dict:
+    """Benchmark one precision mode in the current process."""
+    from models.memory import round_mb
+    from models.model_registry import acquire_seq2seq
+
+    start = time.perf_counter()
+    shared = acquire_seq2seq(model_name, "cpu", dtype)
+    load_seconds = time.perf_counter() - start
+
+    # Warm up kernels/allocator before timing
+    shared.generate(PROMPTS[0], **GENERATE_KWARGS)
+
+    latencies: List[float] = []
+    outputs: List[str] = []
+    for _ in range(repeats):
+        outputs = []
+        for prompt in PROMPTS:
+            start = time.perf_counter()
+            outputs.append(shared.generate(prompt, **GENERATE_KWARGS))
+            latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "dtype": dtype,
+        "load_seconds": round(load_seconds, 3),
+        "latency_mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "latency_p95_ms": round(
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1
+        ),
+        "peak_rss_mb": round_mb(peak_rss_mb()),
+        "outputs": outputs,
+    }
+
+
+def drift(reference: List[str], outputs: List[str]) -> Dict:
+    similarities = [
+        difflib.SequenceMatcher(None, ref, out).ratio()
+        for ref, out in zip(reference, outputs)
+    ]
+    return {
+        "exact_matches": sum(1 for ref, out in zip(reference, outputs) if ref == out),
+        "mean_similarity": round(statistics.mean(similarities), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FLAN-T5 precision mode benchmark")
+    parser.add_argument("--model", default="google/flan-t5-base")
+    parser.add_argument("--modes", nargs="+", default=["float32", "bfloat16", "int8"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Child process: print one JSON line for the parent
+        result = run_mode(args.model, args.worker, args.repeats)
+        print("RESULT " + json.dumps(result))
+        return
+
+    results = []
+    for mode in args.modes:
+        print(f"Benchmarking {mode}...")
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.precision",
+                "--model",
+                args.model,
+                "--repeats",
+                str(args.repeats),
+                "--worker",
+                mode,
+            ],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+        )
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("RESULT ")]
+        if proc.returncode != 0 or not lines:
+            print(f"  {mode} failed:\n{proc.stderr[-2000:]}")
+            continue
+        results.append(json.loads(lines[-1][len("RESULT ") :]))
+
+    reference = next((r for r in results if r["dtype"] == "float32"), None)
+    for result in results:
+        if reference is not None:
+            result["drift_vs_float32"] = drift(reference["outputs"], result["outputs"])
+            result["speedup_vs_float32"] = round(
+                reference["latency_mean_ms"] / result["latency_mean_ms"], 2
+            )
+
+    print()
+    print(
+        f"{'mode':<10} {'load s':>8} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'RSS MB':>8} {'speedup':>8} {'exact':>6} {'similar':>8}"
+    )
+    for r in results:
+        d = r.get("drift_vs_float32", {})
+        print(
+            f"{r['dtype']:<10} {r['load_seconds']:>8} {r['latency_mean_ms']:>9} "
+            f"{r['latency_p50_ms']:>8} {r['latency_p95_ms']:>8} "
+            f"{r['peak_rss_mb'] or 'unknown':>8} "
+            f"{r.get('speedup_vs_float32', '-'):>8} "
+            f"{str(d.get('exact_matches', '-')) + '/' + str(len(PROMPTS)):>6} "
+            f"{d.get('mean_similarity', '-'):>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "results": results}, f, indent=2)
+        print(f"\nResults saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
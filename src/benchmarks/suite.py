@@ -0,0 +1,349 @@
+"""
+Reproducible benchmarks for the chat, specification and render paths.
+
+Every run uses the fixed corpus and seeds in benchmarks/corpus.py and
+writes p50/p95/mean latency, throughput and peak RSS per metric as JSON:
+
+    micro.validate_topic, micro.extract_materials   topic check / catalog lookup
+    chat.generate_response                          full chat answer
+    spec.section.<name>, spec.total                 each spec section alone, whole spec
+    render.step, render.total                       denoising steps, whole render
+
+    python -m benchmarks.suite run --output baseline.json
+    python -m benchmarks.suite run --only micro chat --repeats 5 --output current.json
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.10
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from benchmarks.corpus import QUESTIONS, RENDER_CASES, SEED, SPEC_CASES
+from models.memory import PeakRSSSampler, round_mb
+
+BENCHMARKS = ["micro", "chat", "spec", "render"]
+
+# Lower is better for all of these
+COMPARED_FIELDS = ["p50_ms", "p95_ms", "peak_rss_mb"]
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(
+    latencies: List[float], wall_seconds: float, peak_rss_mb: Optional[float]
+) -> Dict:
+    """Latencies in seconds -> milliseconds stats, throughput and RSS."""
+    ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "n": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 4),
+        "p50_ms": round(_percentile(ms, 0.50), 4),
+        "p95_ms": round(_percentile(ms, 0.95), 4),
+        "throughput_per_s": round(len(ms) / wall_seconds, 3) if wall_seconds else 0.0,
+        "peak_rss_mb": round_mb(peak_rss_mb),
+    }
+
+
+def seed_everything(seed: int = SEED) -> None:
+    random.seed(seed)
+    import torch
+
+    torch.manual_seed(seed)
+
+
+def time_calls(func: Callable[[Any], Any], inputs: Iterable[Any], repeats: int) -> Dict:
+    """Call func on every input, repeats times, timing each call."""
+    inputs = list(inputs)
+    latencies: List[float] = []
+
+    with PeakRSSSampler() as sampler:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for item in inputs:
+                call_start = time.perf_counter()
+                func(item)
+                latencies.append(time.perf_counter() - call_start)
+        wall_seconds = time.perf_counter() - start
+
+    return summarize(latencies, wall_seconds, sampler.peak_mb)
+
+
+def bench_micro(chat_model: Any, iterations: int) -> Dict[str, Dict]:
+    return {
+        "micro.validate_topic": time_calls(
+            chat_model.validate_topic, QUESTIONS, iterations
+        ),
+        "micro.extract_materials": time_calls(
+            chat_model._extract_relevant_materials, QUESTIONS, iterations
+        ),
+    }
+
+
+def bench_chat(chat_model: Any, repeats: int) -> Dict[str, Dict]:
+    def answer(question: str) -> None:
+        seed_everything()
+        chat_model.generate_response(question)
+
+    # One untimed pass so the first question does not pay kernel setup
+    answer(QUESTIONS[0])
+    return {"chat.generate_response": time_calls(answer, QUESTIONS, repeats)}
+
+
+def bench_spec(repeats: int) -> Dict[str, Dict]:
+    from models.design_generator import DesignGenerator
+
+    # No section cache: every run must generate every section
+    design_gen = DesignGenerator(use_section_cache=False)
+
+    sections: Dict[str, List] = {}
+    for style, space, size, colors in SPEC_CASES:
+        context = design_gen._build_context(
+            design_gen.catalog["styles"].get(style, {}),
+            design_gen.catalog["spaces"].get(space, {}),
+            design_gen.catalog["sizes"].get(size, {}),
+        )
+        prompts = design_gen._section_prompts(style, space, size, colors, context)
+        for name, prompt in prompts.items():
+            # material_0, material_1, ... are timed together
+            sections.setdefault(name.split("_")[0], []).append({name: prompt})
+
+    def generate(prompts: Dict) -> None:
+        seed_everything()
+        design_gen._generate_batch(prompts)
+
+    def specification(case: tuple) -> None:
+        seed_everything()
+        style, space, size, colors = case
+        design_gen.generate_specification(style, space, size, colors)
+
+    generate(next(iter(sections.values()))[0])
+
+    results = {
+        f"spec.section.{name}": time_calls(generate, prompts, repeats)
+        for name, prompts in sections.items()
+    }
+    results["spec.total"] = time_calls(specification, SPEC_CASES, repeats)
+    return results
+
+
+def bench_render(repeats: int, size: int, steps: int) -> Dict[str, Dict]:
+    from models.render_generator import RenderGenerator
+
+    render_gen = RenderGenerator(use_cache=False, height=size, width=size)
+    render_gen.warmup()
+    output_dir = tempfile.mkdtemp(prefix="bench_renders_")
+
+    # Step 0 also covers prompt encoding; VAE decode is only in render.total
+    step_latencies: List[float] = []
+    marks: List[float] = []
+
+    def on_step(step: int) -> None:
+        now = time.perf_counter()
+        step_latencies.append(now - marks[-1])
+        marks.append(now)
+
+    def render(case: tuple) -> None:
+        style, space, colors, seed = case
+        marks.append(time.perf_counter())
+        render_gen.generate_render(
+            style,
+            space,
+            "",
+            colors,
+            output_dir=output_dir,
+            num_inference_steps=steps,
+            seed=seed,
+        )
+
+    render_gen.step_callback = on_step
+    try:
+        with PeakRSSSampler() as sampler:
+            start = time.perf_counter()
+            total = time_calls(render, RENDER_CASES, repeats)
+            wall_seconds = time.perf_counter() - start
+    finally:
+        render_gen.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "render.step": summarize(step_latencies, wall_seconds, sampler.peak_mb),
+        "render.total": total,
+    }
+
+
+def _metadata(args: argparse.Namespace) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+
+    import torch
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "torch": torch.__version__,
+        "device": "cuda" if torch.cuda.is_available() else "cpu",
+        "threads": torch.get_num_threads(),
+        "seed": SEED,
+        "repeats": args.repeats,
+        "benchmarks": args.only,
+        "env": {
+            name: os.environ[name]
+            for name in ("MODEL_BACKEND", "SEQ2SEQ_DTYPE", "RENDER_SCHEDULER")
+            if name in os.environ
+        },
+    }
+
+
+def run(args: argparse.Namespace) -> Dict:
+    seed_everything()
+    results: Dict[str, Dict] = {}
+
+    chat_model = None
+    if "micro" in args.only or "chat" in args.only:
+        from models.chat_model import TerminacionesChatModel
+
+        chat_model = TerminacionesChatModel(cache_mode="off")
+
+    if "micro" in args.only:
+        print("Benchmarking micro...")
+        results.update(bench_micro(chat_model, args.micro_iterations))
+    if "chat" in args.only:
+        print("Benchmarking chat...")
+        results.update(bench_chat(chat_model, args.repeats))
+    if "spec" in args.only:
+        print("Benchmarking spec...")
+        results.update(bench_spec(args.repeats))
+    if "render" in args.only:
+        print("Benchmarking render...")
+        results.update(bench_render(args.repeats, args.render_size, args.render_steps))
+
+    report = {"meta": _metadata(args), "results": results}
+
+    print()
+    print(
+        f"{'metric':<28} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} "
+        f"{'per s':>9} {'RSS MB':>8}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<28} {r['n']:>5} {r['p50_ms']:>10} {r['p95_ms']:>10} "
+            f"{r['throughput_per_s']:>9} {r['peak_rss_mb'] or 'unknown':>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved: {args.output}")
+
+    return report
+
+
+def compare(
+    baseline: Dict, current: Dict, threshold: float, min_delta_ms: float
+) -> List[str]:
+    """Metrics/fields that got worse than baseline by more than threshold."""
+    regressions = []
+
+    for key in ("device", "torch", "env"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(
+                f"Note: {key} differs ({baseline['meta'].get(key)} -> "
+                f"{current['meta'].get(key)}), results may not be comparable"
+            )
+
+    print(
+        f"{'metric':<28} {'field':<12} {'baseline':>10} {'current':>10} {'change':>8}"
+    )
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None:
+            continue
+        for field in COMPARED_FIELDS:
+            if not base.get(field) or cur.get(field) is None:
+                continue
+            change = cur[field] / base[field] - 1
+            delta = cur[field] - base[field]
+            regressed = change > threshold and (
+                field == "peak_rss_mb" or delta > min_delta_ms
+            )
+            print(
+                f"{name:<28} {field:<12} {base[field]:>10} {cur[field]:>10} "
+                f"{change:>+8.1%}{'  REGRESSION' if regressed else ''}"
+            )
+            if regressed:
+                regressions.append(f"{name}.{field}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chat/spec/render benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.add_argument("--micro-iterations", type=int, default=200)
+    run_parser.add_argument("--render-size", type=int, default=512)
+    run_parser.add_argument("--render-steps", type=int, default=20)
+    run_parser.add_argument("--output", default=None, help="Write results as JSON")
+
+    compare_parser = commands.add_parser(
+        "compare", help="Flag regressions against a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Allowed slowdown (0.10 = 10%%)"
+    )
+    compare_parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.05,
+        help="Ignore latency changes smaller than this (timer noise)",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+
+    regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
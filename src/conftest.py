@@ -0,0 +1,62 @@
+"""
+Shared fixtures: models on the download-free stub/tiny backends
+(models/tiny_backends.py) with no artificial latency.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def stub_backend(monkeypatch):
+    """MODEL_BACKEND/RENDER_BACKEND=stub for everything built in the test."""
+    monkeypatch.setenv("MODEL_BACKEND", "stub")
+    monkeypatch.setenv("RENDER_BACKEND", "stub")
+    monkeypatch.setenv("STUB_LATENCY_MS", "0")
+    monkeypatch.setenv("STUB_STEP_LATENCY_MS", "0")
+
+
+@pytest.fixture
+def tiny_backend(monkeypatch):
+    """Randomly initialized tiny T5 / SD models running the real code paths."""
+    monkeypatch.setenv("MODEL_BACKEND", "tiny")
+    monkeypatch.setenv("RENDER_BACKEND", "tiny")
+
+
+@pytest.fixture
+def stub_chat_model(stub_backend):
+    from models.chat_model import TerminacionesChatModel
+
+    return TerminacionesChatModel(cache_mode="response")
+
+
+@pytest.fixture
+def stub_design_generator(stub_backend, tmp_path):
+    """DesignGenerator whose section cache is saved under tmp_path."""
+    from models.design_generator import DesignGenerator
+    from models.section_cache import SectionCache
+
+    return DesignGenerator(
+        section_cache=SectionCache(path=str(tmp_path / "sections.json"))
+    )
+
+
+@pytest.fixture
+def stub_render_generator(stub_backend, tmp_path):
+    """64x64 RenderGenerator with its render cache under tmp_path."""
+    from models.render_cache import RenderCache
+    from models.render_generator import RenderGenerator
+
+    render_gen = RenderGenerator(
+        cache=RenderCache(str(tmp_path / "render_cache")), height=64, width=64
+    )
+    yield render_gen
+    render_gen.close()
+
+
+@pytest.fixture
+def tiny_render_generator(tiny_backend):
+    from models.render_generator import RenderGenerator
+
+    render_gen = RenderGenerator(use_cache=False, height=64, width=64)
+    yield render_gen
+    render_gen.close()
@@ -58,20 +58,25 @@ def example_multiple_designs() -> None:
         ("mediterranean", "facade", "medium", ["white", "terracotta"]),
     ]
 
+    requests = []
     for style, space, size, colors in designs:
         print(f"\nGenerating: {style} {space} {size}")
 
         spec = design_gen.generate_specification(style, space, size, colors)
 
-        image, path = render_gen.generate_render(
-            style,
-            space,
-            spec,
-            colors,
-            filename=f"{style}_{space}_example.png",
-            num_inference_steps=25,
+        requests.append(
+            {
+                "style": style,
+                "space": space,
+                "specification": spec,
+                "colors": colors,
+                "filename": f"{style}_{space}_example.png",
+                "num_inference_steps": 25,
+            }
         )
 
+    # Compatible designs are rendered together in one pipeline call
+    for image, path in render_gen.generate_renders(requests):
         print(f"Completed: {path}")
 
 
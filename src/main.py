@@ -1,7 +1,8 @@
 import argparse
 import os
+import sys
 from models.design_generator import DesignGenerator
-from models.render_generator import RenderGenerator
+from models.schedulers import SCHEDULER_PRESETS
 
 
 def main() -> None:
@@ -12,7 +13,6 @@ def main() -> None:
     parser.add_argument(
         "--style",
         type=str,
-        required=True,
         choices=[
             "rustic",
             "brutalism",
@@ -29,7 +29,6 @@ def main() -> None:
     parser.add_argument(
         "--space",
         type=str,
-        required=True,
         choices=[
             "facade",
             "living_room",
@@ -46,7 +45,6 @@ def main() -> None:
     parser.add_argument(
         "--size",
         type=str,
-        required=True,
         choices=["small", "medium", "large"],
         help="Space size",
     )
@@ -54,7 +52,6 @@ def main() -> None:
     parser.add_argument(
         "--colors",
         type=str,
-        required=True,
         help="Color palette separated by comma (e.g.: grey,beige)",
     )
 
@@ -71,8 +68,20 @@ def main() -> None:
     parser.add_argument(
         "--steps",
         type=int,
-        default=50,
-        help="Inference steps for Stable Diffusion (default: 50)",
+        default=None,
+        help="Inference steps for Stable Diffusion (default: the scheduler's recommended steps)",
+    )
+
+    parser.add_argument(
+        "--scheduler",
+        type=str,
+        choices=list(SCHEDULER_PRESETS),
+        default=None,
+        help="Diffusion scheduler: "
+        + ", ".join(
+            f"{name} ({p['steps']} steps)" for name, p in SCHEDULER_PRESETS.items()
+        )
+        + " (default: RENDER_SCHEDULER or default)",
     )
 
     parser.add_argument(
@@ -82,8 +91,110 @@ def main() -> None:
         help="Guidance scale for Stable Diffusion (default: 7.5)",
     )
 
+    parser.add_argument(
+        "--batch",
+        type=str,
+        default=None,
+        metavar="MANIFEST",
+        help="Generate every entry of a .jsonl/.csv manifest (style, space, size, colors) with models loaded once; reruns resume",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for Stable Diffusion; repeated seeded renders come from the render cache",
+    )
+
+    parser.add_argument(
+        "--width",
+        type=int,
+        default=768,
+        help="Render width in pixels, multiple of 8 (default: 768)",
+    )
+
+    parser.add_argument(
+        "--height",
+        type=int,
+        default=768,
+        help="Render height in pixels, multiple of 8 (default: 768)",
+    )
+
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Render a quick half-resolution, low-step draft first; the full render reuses its seed",
+    )
+
+    parser.add_argument(
+        "--highres",
+        type=int,
+        default=None,
+        metavar="PX",
+        help="Upscale the render to PX pixels on the long side, refining it in 512px tiles (memory stays flat)",
+    )
+
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=None,
+        metavar="MB",
+        help="Keep the process RSS under this many MB while rendering (picks attention/VAE slicing, VAE tiling and smaller batches)",
+    )
+
+    parser.add_argument(
+        "--warm-cache",
+        action="store_true",
+        help="Pre-generate reusable spec sections for every catalog style and space (and --colors if given) into SECTION_CACHE_PATH, then exit",
+    )
+
     args = parser.parse_args()
 
+    if args.warm_cache:
+        # Without a file the warmed sections would be lost on exit
+        if not os.environ.get("SECTION_CACHE_PATH"):
+            parser.error(
+                "--warm-cache needs SECTION_CACHE_PATH set to the file to save "
+                "the sections to (and load them from in later runs)"
+            )
+        design_gen = DesignGenerator()
+        palettes = [[c.strip() for c in args.colors.split(",")]] if args.colors else []
+        generated = design_gen.warm_section_cache(palettes=palettes)
+        print(f"\nSection cache warmed: {generated} sections generated")
+        print(f"  Entries: {len(design_gen.section_cache)}")
+        print(f"  Saved to: {design_gen.section_cache.path}")
+        return
+
+    if args.batch:
+        from batch_runner import run_batch
+
+        if args.preview and args.highres:
+            parser.error("--batch takes either --preview or --highres, not both")
+
+        run_batch(
+            args.batch,
+            output_dir=args.output_dir,
+            no_render=args.no_render,
+            steps=args.steps,
+            guidance=args.guidance,
+            seed=args.seed,
+            scheduler=args.scheduler,
+            memory_budget_mb=args.memory_budget,
+            height=args.height,
+            width=args.width,
+            preview=args.preview,
+            highres=args.highres,
+        )
+        return
+
+    missing = [
+        f"--{name}"
+        for name in ("style", "space", "size", "colors")
+        if getattr(args, name) is None
+    ]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+
     colors_list = [c.strip() for c in args.colors.split(",")]
 
     print("=" * 80)
@@ -104,6 +215,7 @@ def main() -> None:
     specification = design_gen.generate_specification(
         style=args.style, space=args.space, size=args.size, colors=colors_list
     )
+    design_gen.save_section_cache()
 
     spec_dir = os.path.join(args.output_dir, "specifications")
     os.makedirs(spec_dir, exist_ok=True)
@@ -124,20 +236,68 @@ def main() -> None:
         print("\n[PHASE 2/2] Generating photorealistic render...")
         print("-" * 80)
 
-        render_gen = RenderGenerator()
+        # Imported here so spec-only runs never load the render stack
+        from models.render_generator import RenderGenerator
+
+        render_gen = RenderGenerator(
+            scheduler=args.scheduler, memory_budget_mb=args.memory_budget
+        )
 
         render_dir = os.path.join(args.output_dir, "renders")
 
-        image, render_path = render_gen.generate_render(
-            style=args.style,
-            space=args.space,
-            specification=specification,
-            colors=colors_list,
-            output_dir=render_dir,
-            filename=f"{args.style}_{args.space}_{args.size}.png",
-            num_inference_steps=args.steps,
-            guidance_scale=args.guidance,
-        )
+        seed = args.seed
+
+        if args.preview:
+            _, preview_path, seed = render_gen.generate_preview(
+                style=args.style,
+                space=args.space,
+                specification=specification,
+                colors=colors_list,
+                output_dir=render_dir,
+                filename=f"{args.style}_{args.space}_{args.size}_preview.png",
+                guidance_scale=args.guidance,
+                seed=seed,
+                height=args.height,
+                width=args.width,
+            )
+            print(f"\nPreview saved: {preview_path} (seed {seed})")
+
+            # Only ask when someone is there to answer
+            if not sys.stdin.isatty() or input(
+                "Render full resolution with this seed? [y/N] "
+            ).strip().lower() not in ("y", "yes", "s", "si"):
+                print(f"Full render skipped; rerun with --seed {seed} to render it")
+                return
+
+        if args.highres:
+            image, render_path = render_gen.generate_highres(
+                style=args.style,
+                space=args.space,
+                specification=specification,
+                colors=colors_list,
+                output_dir=render_dir,
+                filename=f"{args.style}_{args.space}_{args.size}_{args.highres}px.png",
+                target_size=args.highres,
+                num_inference_steps=args.steps,
+                guidance_scale=args.guidance,
+                seed=seed,
+                height=args.height,
+                width=args.width,
+            )
+        else:
+            image, render_path = render_gen.generate_render(
+                style=args.style,
+                space=args.space,
+                specification=specification,
+                colors=colors_list,
+                output_dir=render_dir,
+                filename=f"{args.style}_{args.space}_{args.size}.png",
+                num_inference_steps=args.steps,
+                guidance_scale=args.guidance,
+                seed=seed,
+                height=args.height,
+                width=args.width,
+            )
 
         print(f"\nRender saved: {render_path}")
         print(f"Resolution: {image.size[0]}x{image.size[1]}")
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Groups returned by get_materials_by_category, in response order
+CATEGORY_GROUPS: Dict[str, List[str]] = {
+    "bathroom_finishes": ["ceramics"],
+    "paints": ["interior_paints", "exterior_paints"],
+    "flooring": ["ceramic_floors", "wood_floors", "vinyl_floors"],
+}
+
+DEFAULT_CATALOG_PATH = os.path.join(
+    os.path.dirname(__file__), "../data/materials_catalog.json"
+)
+
+_PRICE_PATTERN = re.compile(
+    r"\$?\s*([\d.]+)\s*(?:-\s*\$?\s*([\d.]+))?\s*(?:/\s*(\S+))?"
+)
+
+
+def parse_price_range(
+    price: Optional[str],
+) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """Parse "$45-65/m2" into (45.0, 65.0, "m2")."""
+    if not price:
+        return None, None, None
+
+    match = _PRICE_PATTERN.search(price)
+    if match is None:
+        return None, None, None
+
+    try:
+        price_min = float(match.group(1))
+        price_max = float(match.group(2)) if match.group(2) else price_min
+    except ValueError:
+        return None, None, None
+
+    return price_min, price_max, match.group(3)
+
+
+def parse_percentage(value: Optional[str]) -> Optional[float]:
+    """Parse "<0.5%" into 0.5."""
+    if not value:
+        return None
+    try:
+        return float(value.replace("%", "").replace("<", "").strip())
+    except ValueError:
+        return None
+
+
+class MaterialRecord:
+    """A catalog material with its numeric fields parsed once."""
+
+    def __init__(self, data: Dict[str, Any], category: str, group: str) -> None:
+        self.data = data
+        self.category = category
+        self.group = group
+        self.price_min, self.price_max, self.price_unit = parse_price_range(
+            data.get("price_range")
+        )
+        self.water_absorption = parse_percentage(data.get("water_absorption"))
+
+        colors = data.get("colors", [])
+        self.colors = [c.lower() for c in colors] if isinstance(colors, list) else []
+
+    @property
+    def price_avg(self) -> Optional[float]:
+        if self.price_min is None or self.price_max is None:
+            return None
+        return (self.price_min + self.price_max) / 2
+
+
+class CatalogIndex:
+    """
+    Read-only index over materials_catalog.json, built once at load time.
+    Holds parsed prices and water absorption, category/group tuples,
+    style material lists and color lookups.
+    """
+
+    def __init__(self, catalog: Dict[str, Any]) -> None:
+        self.catalog = catalog
+        self.records: List[MaterialRecord] = []
+        self._by_id: Dict[int, MaterialRecord] = {}
+        self._groups: Dict[Tuple[str, str], Tuple[Dict, ...]] = {}
+        self._styles: Dict[str, List[Dict]] = {}
+        self._by_color: Dict[str, List[Dict]] = {}
+
+        for style_name, style_data in catalog.get("styles", {}).items():
+            materials = style_data.get("materials", [])
+            self._styles[style_name] = list(materials)
+            for material in materials:
+                self._add(material, "styles", style_name)
+
+        for category, groups in catalog.items():
+            if category in ("styles", "spaces", "sizes") or not isinstance(
+                groups, dict
+            ):
+                continue
+            for group, materials in groups.items():
+                if not isinstance(materials, list):
+                    continue
+                self._groups[(category, group)] = tuple(materials)
+                for material in materials:
+                    self._add(material, category, group)
+
+        self._categories: Dict[str, Tuple[Dict, ...]] = {
+            category: tuple(
+                m for group in groups for m in self._groups.get((category, group), ())
+            )
+            for category, groups in CATEGORY_GROUPS.items()
+        }
+
+    def _add(self, material: Dict, category: str, group: str) -> None:
+        record = MaterialRecord(material, category, group)
+        self.records.append(record)
+        self._by_id[id(material)] = record
+
+        keys = set(record.colors)
+        for color in record.colors:
+            keys.update(color.split())
+        for key in keys:
+            self._by_color.setdefault(key, []).append(material)
+
+    def record(self, material: Dict) -> Optional[MaterialRecord]:
+        return self._by_id.get(id(material))
+
+    def group(self, category: str, group: str) -> Tuple[Dict, ...]:
+        return self._groups.get((category, group), ())
+
+    def category(self, category: str) -> Tuple[Dict, ...]:
+        return self._categories.get(category, ())
+
+    def style_materials(self, style: str) -> List[Dict]:
+        return self._styles.get(style, [])
+
+    def by_color(self, color: str) -> List[Dict]:
+        return self._by_color.get(color.lower().strip(), [])
+
+    def low_absorption(
+        self, category: str, group: str, max_absorption: float = 1.0
+    ) -> List[Dict]:
+        """Materials of a group with water absorption below max_absorption (%)."""
+        return [
+            m
+            for m in self.group(category, group)
+            if self._by_id[id(m)].water_absorption is not None
+            and self._by_id[id(m)].water_absorption < max_absorption
+        ]
+
+
+_indexes: Dict[str, CatalogIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def load_catalog_index(catalog_path: Optional[str] = None) -> CatalogIndex:
+    """Load and index a catalog file once per process."""
+    path = os.path.abspath(catalog_path or DEFAULT_CATALOG_PATH)
+
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            with open(path, "r", encoding="utf-8") as f:
+                index = CatalogIndex(json.load(f))
+            _indexes[path] = index
+
+    return index
@@ -1,8 +1,16 @@
-import json
+import contextlib
 import os
-from typing import Dict, List, Optional
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from typing import Dict, Iterator, List, Optional
+from models.model_registry import (
+    acquire_seq2seq,
+    default_device,
+    default_seq2seq_backend,
+    default_seq2seq_dtype,
+    release_seq2seq,
+)
+from models.catalog_index import load_catalog_index
+from models.message_analyzer import MessageAnalysis, MessageAnalyzer
+from models.response_cache import ResponseCache, response_cache_key
 
 
 class TerminacionesChatModel:
@@ -12,33 +20,41 @@ class TerminacionesChatModel:
         catalog_path: str = None,
         system_prompt_path: str = None,
         model_name: str = "google/flan-t5-base",
+        device: Optional[str] = None,
+        dtype: Optional[str] = None,
+        backend: Optional[str] = None,
+        cache_mode: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
     ):
         self.model_name = model_name
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device or default_device()
+        self.dtype = dtype or default_seq2seq_dtype()
+        self.backend = backend or default_seq2seq_backend()
 
         print(f"Initializing TerminacionesChatModel with {model_name}...")
         print(f"Device: {self.device}")
 
-        # Load model
+        # Load model (shared with other model classes through the registry)
+        self._shared = None
+        # Why the model is missing, if it is (requests then use templates)
+        self.load_error: Optional[str] = None
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-            self.model.to(self.device)
-            self.model.eval()
+            self._shared = acquire_seq2seq(
+                model_name, self.device, self.dtype, self.backend
+            )
+            self.tokenizer = self._shared.tokenizer
+            self.model = self._shared.model
             print(f"Model loaded successfully")
         except Exception as e:
             print(f"Error loading model: {e}")
+            self.load_error = str(e)
             self.model = None
             self.tokenizer = None
 
         # Load materials catalog
-        if catalog_path is None:
-            catalog_path = os.path.join(
-                os.path.dirname(__file__), "../data/materials_catalog.json"
-            )
-
-        with open(catalog_path, "r", encoding="utf-8") as f:
-            self.catalog = json.load(f)
+        self.catalog_index = load_catalog_index(catalog_path)
+        self.catalog = self.catalog_index.catalog
 
         # Load system prompt
         if system_prompt_path is None:
@@ -49,6 +65,23 @@ class TerminacionesChatModel:
         with open(system_prompt_path, "r", encoding="utf-8") as f:
             self.system_prompt = f.read()
 
+        # Optional response cache: "off", "intro" (reuse AI intros) or
+        # "response" (reuse the whole answer text)
+        if cache_mode is None:
+            cache_mode = os.environ.get("CHAT_CACHE_MODE", "off")
+        if cache_mode not in ("off", "intro", "response"):
+            raise ValueError(f"Invalid cache_mode: {cache_mode}")
+        self.cache_mode = cache_mode
+
+        self.response_cache = None
+        if cache_mode != "off":
+            if cache_size is None:
+                cache_size = int(os.environ.get("CHAT_CACHE_SIZE", "1024"))
+            if cache_ttl is None:
+                cache_ttl = float(os.environ.get("CHAT_CACHE_TTL", "3600"))
+            self.response_cache = ResponseCache(cache_size, cache_ttl)
+            print(f"Response cache enabled ({cache_mode}, {cache_size} entries)")
+
         # Keywords for topic validation
         self.terminaciones_keywords = [
             # Enchapes
@@ -114,23 +147,42 @@ class TerminacionesChatModel:
             "fachada",
         ]
 
+        # Compiled once; every request is analyzed in a single pass
+        self.analyzer = MessageAnalyzer(
+            self.terminaciones_keywords, self.catalog.get("styles", {}).keys()
+        )
+
         print("TerminacionesChatModel ready")
 
-    def validate_topic(self, message: str) -> bool:
-        message_lower = message.lower()
+    def close(self) -> None:
+        """Release this instance's reference to the shared model."""
+        if self._shared is not None:
+            release_seq2seq(self.model_name, self.device, self.dtype, self.backend)
+            self._shared = None
+            self.model = None
+            self.tokenizer = None
 
-        # Check for keywords
-        for keyword in self.terminaciones_keywords:
-            if keyword in message_lower:
-                return True
+    def analyze(self, message: str) -> MessageAnalysis:
+        return self.analyzer.analyze(message)
 
-        return False
+    def validate_topic(
+        self, message: str, analysis: Optional[MessageAnalysis] = None
+    ) -> bool:
+        if analysis is None:
+            analysis = self.analyze(message)
+        return analysis.on_topic
 
     def generate_response(
-        self, user_message: str, context: Optional[List[str]] = None
+        self,
+        user_message: str,
+        context: Optional[List[str]] = None,
+        analysis: Optional[MessageAnalysis] = None,
     ) -> Dict:
+        if analysis is None:
+            analysis = self.analyze(user_message)
+
         # Validate topic
-        if not self.validate_topic(user_message):
+        if not self.validate_topic(user_message, analysis):
             return {
                 "response": "Me especializo únicamente en terminaciones arquitectónicas como enchapes, pinturas, baños y acabados. ¿Puedo ayudarte con alguno de estos temas?",
                 "on_topic": False,
@@ -139,19 +191,47 @@ class TerminacionesChatModel:
 
         try:
             # Extract relevant materials from catalog
-            materials_suggested = self._extract_relevant_materials(user_message)
+            materials_suggested = self._extract_relevant_materials(
+                user_message, analysis
+            )
+
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = response_cache_key(
+                    user_message, [m.get("name", "") for m in materials_suggested]
+                )
+
+            if self.cache_mode == "response":
+                cached_response = self.response_cache.get(cache_key)
+                if cached_response is not None:
+                    return {
+                        "response": cached_response,
+                        "on_topic": True,
+                        "materials_suggested": materials_suggested,
+                    }
 
             # Use AI model to generate initial response
-            if self.model is not None and self.tokenizer is not None:
+            ai_response = None
+            if self.cache_mode == "intro":
+                ai_response = self.response_cache.get(cache_key)
+
+            model_ready = self.model is not None and self.tokenizer is not None
+            if ai_response is None and model_ready:
                 ai_response = self._generate_ai_intro(user_message, materials_suggested)
-            else:
-                ai_response = None
+                if ai_response is not None and self.cache_mode == "intro":
+                    self.response_cache.set(cache_key, ai_response)
 
             # Generate natural language response with AI intro
             response_text = self._generate_natural_response(
-                user_message, materials_suggested, ai_intro=ai_response
+                user_message,
+                materials_suggested,
+                ai_intro=ai_response,
+                analysis=analysis,
             )
 
+            if self.cache_mode == "response":
+                self.response_cache.set(cache_key, response_text)
+
             return {
                 "response": response_text,
                 "on_topic": True,
@@ -166,42 +246,127 @@ class TerminacionesChatModel:
                 "materials_suggested": [],
             }
 
-    def _generate_ai_intro(
-        self, user_message: str, materials: List[Dict]
-    ) -> Optional[str]:
-        """Use FLAN-T5 to generate a natural, contextual introduction"""
-        try:
-            # Create a context-aware prompt
-            materials_context = ""
-            if materials:
-                material_names = [m.get("name", "") for m in materials[:2]]
-                materials_context = f"Considering materials like {', '.join(material_names)}."
+    def stream_response(
+        self, user_message: str, analysis: Optional[MessageAnalysis] = None
+    ) -> Iterator[Dict]:
+        """
+        Streaming variant of generate_response.
+        Yields {"event": "token", "data": text} while the AI intro is decoded,
+        then a final {"event": "response", "data": {...}} with the full answer.
+        """
+        if analysis is None:
+            analysis = self.analyze(user_message)
+
+        if not self.validate_topic(user_message, analysis):
+            result = self.generate_response(user_message, analysis=analysis)
+            yield {"event": "response", "data": result}
+            return
+
+        materials_suggested = self._extract_relevant_materials(user_message, analysis)
+
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = response_cache_key(
+                user_message, [m.get("name", "") for m in materials_suggested]
+            )
+
+        if self.cache_mode == "response":
+            cached_response = self.response_cache.get(cache_key)
+            if cached_response is not None:
+                yield {
+                    "event": "response",
+                    "data": {
+                        "response": cached_response,
+                        "on_topic": True,
+                        "materials_suggested": materials_suggested,
+                    },
+                }
+                return
+
+        ai_response = None
+        if self.cache_mode == "intro":
+            ai_response = self.response_cache.get(cache_key)
+            if ai_response is not None:
+                yield {"event": "token", "data": ai_response}
+
+        model_ready = self.model is not None and self.tokenizer is not None
+        if ai_response is None and model_ready:
+            pieces = []
+            stream = self._shared.stream(
+                self._build_intro_prompt(user_message, materials_suggested),
+                max_length=100,
+                min_length=15,
+                temperature=0.9,
+                do_sample=True,
+                top_p=0.95,
+                repetition_penalty=1.3,
+            )
+            try:
+                # closing(): if our consumer stops, stop the generation too
+                with contextlib.closing(stream):
+                    for text in stream:
+                        pieces.append(text)
+                        yield {"event": "token", "data": text}
+            except Exception as e:
+                print(f"Error streaming AI intro: {e}")
+
+            generated = "".join(pieces).strip()
+            ai_response = generated if len(generated) > 10 else None
+            if ai_response is not None and self.cache_mode == "intro":
+                self.response_cache.set(cache_key, ai_response)
+
+        response_text = self._generate_natural_response(
+            user_message,
+            materials_suggested,
+            ai_intro=ai_response,
+            analysis=analysis,
+        )
+
+        if self.cache_mode == "response":
+            self.response_cache.set(cache_key, response_text)
+
+        yield {
+            "event": "response",
+            "data": {
+                "response": response_text,
+                "on_topic": True,
+                "materials_suggested": materials_suggested,
+            },
+        }
 
-            prompt = f"""You are a helpful architectural finishes consultant. Answer this question naturally in Spanish (1-2 sentences).
+    def _build_intro_prompt(self, user_message: str, materials: List[Dict]) -> str:
+        # Create a context-aware prompt
+        materials_context = ""
+        if materials:
+            material_names = [m.get("name", "") for m in materials[:2]]
+            materials_context = f"Considering materials like {', '.join(material_names)}."
+
+        return f"""You are a helpful architectural finishes consultant. Answer this question naturally in Spanish (1-2 sentences).
 
 Question: {user_message}
 {materials_context}
 
 Natural answer:"""
 
-            inputs = self.tokenizer(
-                prompt, return_tensors="pt", max_length=512, truncation=True
-            ).to(self.device)
-
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_length=100,
-                    min_length=15,
-                    num_beams=4,
-                    temperature=0.9,
-                    do_sample=True,
-                    top_p=0.95,
-                    repetition_penalty=1.3,
-                )
+    def _generate_ai_intro(
+        self, user_message: str, materials: List[Dict]
+    ) -> Optional[str]:
+        """Use FLAN-T5 to generate a natural, contextual introduction"""
+        try:
+            prompt = self._build_intro_prompt(user_message, materials)
 
-            generated = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            return generated.strip() if len(generated.strip()) > 10 else None
+            # Batched together with concurrent requests for the same model
+            generated = self._shared.generate(
+                prompt,
+                max_length=100,
+                min_length=15,
+                num_beams=4,
+                temperature=0.9,
+                do_sample=True,
+                top_p=0.95,
+                repetition_penalty=1.3,
+            )
+            return generated if len(generated) > 10 else None
 
         except Exception as e:
             print(f"Error generating AI intro: {e}")
@@ -222,79 +387,71 @@ Respuesta recomendada:"""
         return prompt
 
     def _generate_with_model(self, prompt: str, max_length: int = 150) -> str:
-        inputs = self.tokenizer(
-            prompt, return_tensors="pt", max_length=512, truncation=True
-        ).to(self.device)
-
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_length=max_length,
-                min_length=20,
-                num_beams=4,
-                early_stopping=True,
-                temperature=0.8,
-                do_sample=True,
-                top_p=0.92,
-                repetition_penalty=1.2,
-            )
-
-        generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return generated_text.strip()
-
-    def _extract_relevant_materials(self, user_message: str) -> List[Dict]:
+        return self._shared.generate(
+            prompt,
+            max_length=max_length,
+            min_length=20,
+            num_beams=4,
+            early_stopping=True,
+            temperature=0.8,
+            do_sample=True,
+            top_p=0.92,
+            repetition_penalty=1.2,
+        )
+
+    def _extract_relevant_materials(
+        self, user_message: str, analysis: Optional[MessageAnalysis] = None
+    ) -> List[Dict]:
         materials = []
-        message_lower = user_message.lower()
+        if analysis is None:
+            analysis = self.analyze(user_message)
 
         # Check for specific water-related areas (piscina, spa, etc.)
-        if any(word in message_lower for word in ["piscina", "pool", "spa", "jacuzzi", "alberca"]):
-            # For pools/water areas, recommend ceramic/porcelain materials
-            if "bathroom_finishes" in self.catalog:
-                ceramics = self.catalog["bathroom_finishes"].get("ceramics", [])
-                # Filter water-resistant materials
-                materials.extend([m for m in ceramics if m.get("water_absorption") and float(m.get("water_absorption", "1%").replace("%", "").replace("<", "")) < 1][:2])
+        if analysis.has("water_area"):
+            # For pools/water areas, recommend water-resistant ceramics
+            low_absorption = self.catalog_index.low_absorption(
+                "bathroom_finishes", "ceramics", max_absorption=1.0
+            )
+            materials.extend(low_absorption[:2])
 
         # Check bathroom finishes
-        if any(
-            word in message_lower for word in ["baño", "bath", "ducha", "shower"]
-        ):
-            if "bathroom_finishes" in self.catalog:
-                ceramics = self.catalog["bathroom_finishes"].get("ceramics", [])
-                materials.extend(ceramics[:2])
+        if analysis.has("bathroom"):
+            ceramics = self.catalog_index.group("bathroom_finishes", "ceramics")
+            materials.extend(ceramics[:2])
 
         # Check paints
-        if any(word in message_lower for word in ["pintura", "paint", "pintar"]):
-            if "paints" in self.catalog:
-                # Check if exterior or interior
-                if any(word in message_lower for word in ["exterior", "afuera", "outside", "fachada"]):
-                    exterior_paints = self.catalog["paints"].get("exterior_paints", [])
-                    materials.extend(exterior_paints[:2])
-                else:
-                    interior_paints = self.catalog["paints"].get("interior_paints", [])
-                    materials.extend(interior_paints[:2])
+        if analysis.has("paint"):
+            # Check if exterior or interior
+            if analysis.has("exterior"):
+                exterior_paints = self.catalog_index.group("paints", "exterior_paints")
+                materials.extend(exterior_paints[:2])
+            else:
+                interior_paints = self.catalog_index.group("paints", "interior_paints")
+                materials.extend(interior_paints[:2])
 
         # Check flooring
-        if any(word in message_lower for word in ["piso", "floor", "suelo"]):
-            if "flooring" in self.catalog:
-                ceramic_floors = self.catalog["flooring"].get("ceramic_floors", [])
-                materials.extend(ceramic_floors[:2])
+        if analysis.has("flooring"):
+            ceramic_floors = self.catalog_index.group("flooring", "ceramic_floors")
+            materials.extend(ceramic_floors[:2])
 
         # Check for outdoor/wet areas keywords
-        if any(word in message_lower for word in ["exterior", "outdoor", "terraza", "balcon", "patio"]):
-            if "flooring" in self.catalog:
-                ceramic_floors = self.catalog["flooring"].get("ceramic_floors", [])
-                materials.extend(ceramic_floors[:2])
+        if analysis.has("outdoor"):
+            ceramic_floors = self.catalog_index.group("flooring", "ceramic_floors")
+            materials.extend(ceramic_floors[:2])
 
         # Check styles (existing catalog)
-        for style_name, style_data in self.catalog.get("styles", {}).items():
-            if style_name in message_lower:
-                style_materials = style_data.get("materials", [])
-                materials.extend(style_materials[:2])
+        for style_name in analysis.styles:
+            style_materials = self.catalog_index.style_materials(style_name)
+            materials.extend(style_materials[:2])
 
         return materials[:3]  # Limit to 3 materials
 
     def _generate_natural_response(
-        self, user_message: str, materials: List[Dict], ai_intro: Optional[str] = None
+        self,
+        user_message: str,
+        materials: List[Dict],
+        ai_intro: Optional[str] = None,
+        analysis: Optional[MessageAnalysis] = None,
     ) -> str:
         """Generate a natural language response with AI-generated intro and material details"""
 
@@ -305,22 +462,23 @@ Respuesta recomendada:"""
             intro = ai_intro + " "
         else:
             # Fallback: generate contextual intro with variety
-            message_lower = user_message.lower()
+            if analysis is None:
+                analysis = self.analyze(user_message)
             intros = []
 
-            if any(word in message_lower for word in ["baño", "bath", "ducha", "shower"]):
+            if analysis.has("bathroom"):
                 base = "baño"
-                if "moderno" in message_lower:
+                if analysis.has("modern"):
                     base += " moderno"
-                elif "rustic" in message_lower or "rústico" in message_lower:
+                elif "rustic" in analysis.styles:
                     base += " rústico"
                 intros = [
                     f"Para un {base}, ",
                     f"Si buscas materiales para un {base}, ",
                     f"En el caso de un {base}, ",
                 ]
-            elif any(word in message_lower for word in ["pintura", "paint", "pintar"]):
-                if any(word in message_lower for word in ["exterior", "afuera", "fachada"]):
+            elif analysis.has("paint"):
+                if analysis.has("exterior"):
                     intros = [
                         "Para pintura de exteriores, ",
                         "Si necesitas pintar el exterior, ",
@@ -332,8 +490,8 @@ Respuesta recomendada:"""
                         "Si quieres pintar interiores, ",
                         "Para espacios interiores, ",
                     ]
-            elif any(word in message_lower for word in ["piso", "floor", "suelo"]):
-                if "cocina" in message_lower:
+            elif analysis.has("flooring"):
+                if analysis.has("space:kitchen"):
                     intros = [
                         "Para el piso de cocina, ",
                         "Si buscas piso para la cocina, ",
@@ -434,24 +592,10 @@ Respuesta recomendada:"""
 
         return response
 
+    def get_cache_stats(self) -> Dict:
+        if self.response_cache is None:
+            return {"mode": "off"}
+        return {"mode": self.cache_mode, **self.response_cache.stats()}
+
     def get_materials_by_category(self, category: str) -> List[Dict]:
-        if category == "bathroom_finishes":
-            result = []
-            bf = self.catalog.get("bathroom_finishes", {})
-            result.extend(bf.get("ceramics", []))
-            return result
-        elif category == "paints":
-            result = []
-            paints = self.catalog.get("paints", {})
-            result.extend(paints.get("interior_paints", []))
-            result.extend(paints.get("exterior_paints", []))
-            return result
-        elif category == "flooring":
-            result = []
-            flooring = self.catalog.get("flooring", {})
-            result.extend(flooring.get("ceramic_floors", []))
-            result.extend(flooring.get("wood_floors", []))
-            result.extend(flooring.get("vinyl_floors", []))
-            return result
-        else:
-            return []
+        return list(self.catalog_index.category(category))
@@ -1,8 +1,21 @@
-import json
-import os
-from typing import List, Dict
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from typing import List, Dict, Optional, Tuple
+from models.catalog_index import load_catalog_index
+from models.model_registry import (
+    acquire_seq2seq,
+    default_device,
+    default_seq2seq_backend,
+    default_seq2seq_dtype,
+    release_seq2seq,
+)
+from models.section_cache import SectionCache, SectionKey
+
+# Sampling settings shared by every section; max_length is set per section
+SECTION_GENERATE_KWARGS = {
+    "num_beams": 4,
+    "early_stopping": True,
+    "temperature": 0.8,
+    "do_sample": True,
+}
 
 
 class DesignGenerator:
@@ -12,35 +25,71 @@ class DesignGenerator:
     """
 
     def __init__(
-        self, catalog_path: str = None, model_name: str = "google/flan-t5-base"
+        self,
+        catalog_path: str = None,
+        model_name: str = "google/flan-t5-base",
+        device: Optional[str] = None,
+        dtype: Optional[str] = None,
+        backend: Optional[str] = None,
+        section_cache: Optional[SectionCache] = None,
+        use_section_cache: bool = True,
     ):
         self.model_name = model_name
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device or default_device()
+        self.dtype = dtype or default_seq2seq_dtype()
+        self.backend = backend or default_seq2seq_backend()
 
         print(f"Initializing DesignGenerator with {model_name}...")
         print(f"Device: {self.device}")
 
+        # Shares weights with TerminacionesChatModel when the config matches
+        self._shared = None
+        # Why the model is missing, if it is (requests then use templates)
+        self.load_error: Optional[str] = None
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-            self.model.to(self.device)
-            self.model.eval()
+            self._shared = acquire_seq2seq(
+                model_name, self.device, self.dtype, self.backend
+            )
+            self.tokenizer = self._shared.tokenizer
+            self.model = self._shared.model
             print(f"Model loaded successfully")
         except Exception as e:
             print(f"Error loading model: {e}")
+            self.load_error = str(e)
             self.model = None
             self.tokenizer = None
 
-        if catalog_path is None:
-            catalog_path = os.path.join(
-                os.path.dirname(__file__), "../data/materials_catalog.json"
-            )
+        self.catalog_index = load_catalog_index(catalog_path)
+        self.catalog = self.catalog_index.catalog
 
-        with open(catalog_path, "r") as f:
-            self.catalog = json.load(f)
+        # Sections that depend only on style/space/colors/material are
+        # generated once and reused across requests
+        self.section_cache = None
+        if use_section_cache:
+            self.section_cache = (
+                section_cache if section_cache is not None else SectionCache()
+            )
 
         print("DesignGenerator ready")
 
+    def close(self) -> None:
+        """Release this instance's reference to the shared model."""
+        if self._shared is not None:
+            release_seq2seq(self.model_name, self.device, self.dtype, self.backend)
+            self._shared = None
+            self.model = None
+            self.tokenizer = None
+
+    def save_section_cache(self) -> Optional[str]:
+        """
+        Write the section cache to SECTION_CACHE_PATH, if set. Requests only
+        update it in memory; callers save after warming, at the end of a run
+        or at shutdown.
+        """
+        if self.section_cache is None:
+            return None
+        return self.section_cache.save()
+
     def generate_specification(
         self,
         style: str,
@@ -79,15 +128,30 @@ class DesignGenerator:
         try:
             specification_parts = []
 
+            # Every section prompt is independent, so they all go out at once
+            prompts = self._section_prompts(style, space, size, colors, context)
+            keys = self._section_keys(style, space, size, colors, context)
+            texts = self._generate_sections(prompts, keys)
+
             sections = [
                 (
                     "overview",
-                    self._generate_overview(style, space, size, colors, context),
+                    self._generate_overview(
+                        style, space, size, colors, context, texts.get("overview")
+                    ),
+                ),
+                ("materials", self._generate_materials(style, colors, context, texts)),
+                ("palette", self._generate_palette(colors, texts.get("palette"))),
+                (
+                    "installation",
+                    self._generate_installation(
+                        style, context, texts.get("installation")
+                    ),
+                ),
+                (
+                    "technical",
+                    self._generate_technical(space, context, texts.get("technical")),
                 ),
-                ("materials", self._generate_materials(style, colors, context)),
-                ("palette", self._generate_palette(colors)),
-                ("installation", self._generate_installation(style, context)),
-                ("technical", self._generate_technical(space, context)),
                 ("budget", self._generate_budget(size, context)),
             ]
 
@@ -110,57 +174,230 @@ class DesignGenerator:
             return self._fallback_generation(style, space, size, colors, context)
 
     def _generate_with_model(self, prompt: str, max_length: int = 150) -> str:
-        """Generate text using FLAN-T5 model."""
-        inputs = self.tokenizer(
-            prompt, return_tensors="pt", max_length=512, truncation=True
-        ).to(self.device)
-
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_length=max_length,
-                num_beams=4,
-                early_stopping=True,
-                temperature=0.8,
-                do_sample=True,
+        """Generate text using FLAN-T5 model (through the shared batcher)."""
+        return self._shared.generate(
+            prompt, max_length=max_length, **SECTION_GENERATE_KWARGS
+        )
+
+    def _generate_batch(
+        self, prompts: Dict[str, Tuple[str, int]]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Submit every section prompt before waiting on any of them.
+        The batcher pads prompts with the same max_length into one generate()
+        call; a failed section maps to None so its template text is used.
+        """
+        futures = {
+            name: self._shared.submit(
+                prompt, max_length=max_length, **SECTION_GENERATE_KWARGS
             )
+            for name, (prompt, max_length) in prompts.items()
+        }
+
+        texts: Dict[str, Optional[str]] = {}
+        for name, future in futures.items():
+            try:
+                texts[name] = future.result()
+            except Exception as e:
+                print(f"Error generating {name}: {e}")
+                texts[name] = None
+
+        return texts
+
+    def _generate_sections(
+        self, prompts: Dict[str, Tuple[str, int]], keys: Dict[str, SectionKey]
+    ) -> Dict[str, Optional[str]]:
+        """Take sections from the section cache and batch-generate the rest."""
+        if self.section_cache is None:
+            return self._generate_batch(prompts)
+
+        texts: Dict[str, Optional[str]] = {}
+        missing = {}
+        for name, prompt in prompts.items():
+            cached = self.section_cache.get(keys[name])
+            if cached is not None:
+                texts[name] = cached
+            else:
+                missing[name] = prompt
 
-        generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return generated_text.strip()
+        if missing:
+            generated = self._generate_batch(missing)
+            for name, text in generated.items():
+                if text is not None:
+                    self.section_cache.set(keys[name], text)
+            texts.update(generated)
 
-    def _generate_overview(
+        print(f"  Sections from cache: {len(prompts) - len(missing)}/{len(prompts)}")
+        return texts
+
+    def warm_section_cache(
+        self,
+        styles: Optional[List[str]] = None,
+        spaces: Optional[List[str]] = None,
+        palettes: Optional[List[List[str]]] = None,
+    ) -> int:
+        """
+        Pre-generate the reusable sections for every catalog style and space
+        (installation, per-material descriptions, technical) plus the given
+        color palettes. Returns the number of sections generated.
+        """
+        if self._shared is None or self.section_cache is None:
+            print("Model or section cache not available, nothing to warm")
+            return 0
+
+        styles = styles if styles is not None else list(self.catalog["styles"])
+        spaces = spaces if spaces is not None else list(self.catalog["spaces"])
+
+        prompts: Dict[str, Tuple[str, int]] = {}
+        keys: Dict[str, SectionKey] = {}
+
+        for style in styles:
+            style_data = self.catalog["styles"].get(style, {})
+            context = self._build_context(style_data, {}, {})
+            prompts[f"installation:{style}"] = (self._installation_prompt(style), 120)
+            keys[f"installation:{style}"] = self._section_key("installation", style)
+            for idx, material in enumerate(context.get("materials", [])[:3]):
+                name = f"material:{style}:{idx}"
+                prompts[name] = (self._material_prompt(style, material), 120)
+                keys[name] = self._section_key("material", material["name"], style)
+
+        for space in spaces:
+            prompts[f"technical:{space}"] = (self._technical_prompt(space), 120)
+            keys[f"technical:{space}"] = self._section_key("technical", space)
+
+        for colors in palettes or []:
+            name = f"palette:{','.join(colors)}"
+            prompts[name] = (self._palette_prompt(colors), 100)
+            keys[name] = self._section_key("palette", *colors)
+
+        pending = {
+            name: prompt
+            for name, prompt in prompts.items()
+            if self.section_cache.get(keys[name]) is None
+        }
+        print(
+            f"Warming section cache: {len(pending)}/{len(prompts)} sections to generate"
+        )
+
+        self._generate_sections(pending, keys)
+        self.save_section_cache()
+        return len(pending)
+
+    def _section_key(self, section: str, *inputs: str) -> SectionKey:
+        # Tiny/stub output must never be reused for the real model
+        model = self.model_name
+        if self.backend in ("tiny", "stub"):
+            model = f"{model}:{self.backend}"
+        return (model, section, *inputs)
+
+    def _section_keys(
+        self, style: str, space: str, size: str, colors: List[str], context: Dict
+    ) -> Dict[str, SectionKey]:
+        """Cache keys for _section_prompts, built from each prompt's inputs."""
+        keys = {
+            "overview": self._section_key("overview", style, space, size, *colors),
+        }
+        for idx, material in enumerate(context.get("materials", [])[:3]):
+            keys[f"material_{idx}"] = self._section_key(
+                "material", material.get("name", ""), style
+            )
+        keys["palette"] = self._section_key("palette", *colors)
+        keys["installation"] = self._section_key("installation", style)
+        keys["technical"] = self._section_key("technical", space)
+
+        return keys
+
+    def _section_prompts(
+        self, style: str, space: str, size: str, colors: List[str], context: Dict
+    ) -> Dict[str, Tuple[str, int]]:
+        """Build (prompt, max_length) for every model-written section."""
+        prompts = {
+            "overview": (
+                self._overview_prompt(style, space, size, colors, context),
+                200,
+            ),
+        }
+        for idx, material in enumerate(context.get("materials", [])[:3]):
+            prompts[f"material_{idx}"] = (self._material_prompt(style, material), 120)
+        prompts["palette"] = (self._palette_prompt(colors), 100)
+        prompts["installation"] = (self._installation_prompt(style), 120)
+        prompts["technical"] = (self._technical_prompt(space), 120)
+
+        return prompts
+
+    def _overview_prompt(
         self, style: str, space: str, size: str, colors: List[str], context: Dict
     ) -> str:
-        """Generate project overview section."""
         style_name = context.get("style_name", style.title())
         space_name = space.replace("_", " ").title()
         size_range = context.get("size_range", "")
         characteristics = context.get("characteristics", "")
 
-        prompt = f"""Write a professional architectural project overview for a {style_name} style {space_name} of {size} size ({size_range}).
+        return f"""Write a professional architectural project overview for a {style_name} style {space_name} of {size} size ({size_range}).
 Include the design philosophy focusing on {characteristics}.
 Preferred colors: {', '.join(colors)}.
 Keep it technical and professional."""
 
-        try:
-            overview_text = self._generate_with_model(prompt, max_length=200)
-
-            overview = f"ARCHITECTURAL DESIGN SPECIFICATION\n"
-            overview += f"{'=' * 60}\n\n"
-            overview += f"PROJECT OVERVIEW\n"
-            overview += f"Style: {style_name}\n"
-            overview += f"Space: {space_name}\n"
-            overview += f"Size: {size.title()} ({size_range})\n"
-            overview += f"Color Palette: {', '.join(colors)}\n\n"
-            overview += f"Design Philosophy:\n{overview_text}\n"
-            overview += f"\nKey Characteristics: {characteristics}"
-
-            return overview
-        except Exception as e:
-            print(f"Error generating overview: {e}")
+    def _material_prompt(self, style: str, material: Dict) -> str:
+        mat_name = material.get("name", "")
+        mat_type = material.get("type", "").replace("_", " ").title()
+        mat_texture = material.get("texture", "")
+        mat_finish = material.get("finish", "")
+
+        return f"""Describe the application of {mat_name} ({mat_type}) in {style} architecture.
+Focus on texture ({mat_texture}), finish ({mat_finish}), and aesthetic impact.
+Keep it concise and technical."""
+
+    def _palette_prompt(self, colors: List[str]) -> str:
+        return f"""Explain how to use these colors in architectural design: {', '.join(colors)}.
+Describe distribution, balance, and visual impact. Keep it professional."""
+
+    def _installation_prompt(self, style: str) -> str:
+        return f"""Describe installation patterns and techniques for {style} style architecture.
+Include layout, joint treatment, and special techniques. Be specific and technical."""
+
+    def _technical_prompt(self, space: str) -> str:
+        space_name = space.replace("_", " ").title()
+        return f"""List technical requirements for {space_name} construction.
+Include structural, weather protection, and maintenance needs. Be specific."""
+
+    def _generate_overview(
+        self,
+        style: str,
+        space: str,
+        size: str,
+        colors: List[str],
+        context: Dict,
+        overview_text: Optional[str],
+    ) -> str:
+        """Generate project overview section."""
+        if overview_text is None:
             return self._template_overview(style, space, size, colors, context)
 
-    def _generate_materials(self, style: str, colors: List[str], context: Dict) -> str:
+        style_name = context.get("style_name", style.title())
+        space_name = space.replace("_", " ").title()
+        size_range = context.get("size_range", "")
+        characteristics = context.get("characteristics", "")
+
+        overview = f"ARCHITECTURAL DESIGN SPECIFICATION\n"
+        overview += f"{'=' * 60}\n\n"
+        overview += f"PROJECT OVERVIEW\n"
+        overview += f"Style: {style_name}\n"
+        overview += f"Space: {space_name}\n"
+        overview += f"Size: {size.title()} ({size_range})\n"
+        overview += f"Color Palette: {', '.join(colors)}\n\n"
+        overview += f"Design Philosophy:\n{overview_text}\n"
+        overview += f"\nKey Characteristics: {characteristics}"
+
+        return overview
+
+    def _generate_materials(
+        self,
+        style: str,
+        colors: List[str],
+        context: Dict,
+        texts: Dict[str, Optional[str]],
+    ) -> str:
         """Generate materials section."""
         materials = context.get("materials", [])
 
@@ -177,13 +414,8 @@ Keep it technical and professional."""
             mat_finish = material.get("finish", "")
             price = material.get("price_range", "")
 
-            prompt = f"""Describe the application of {mat_name} ({mat_type}) in {style} architecture.
-Focus on texture ({mat_texture}), finish ({mat_finish}), and aesthetic impact.
-Keep it concise and technical."""
-
-            try:
-                description = self._generate_with_model(prompt, max_length=120)
-            except:
+            description = texts.get(f"material_{idx - 1}")
+            if description is None:
                 description = f"High-quality {mat_type} providing {mat_texture} texture with {mat_finish} finish."
 
             section += f"{idx}. {mat_name.upper()}\n"
@@ -196,16 +428,11 @@ Keep it concise and technical."""
 
         return section
 
-    def _generate_palette(self, colors: List[str]) -> str:
+    def _generate_palette(self, colors: List[str], palette_desc: Optional[str]) -> str:
         """Generate color palette section."""
         section = "COLOR PALETTE\n" + "-" * 60 + "\n\n"
 
-        prompt = f"""Explain how to use these colors in architectural design: {', '.join(colors)}.
-Describe distribution, balance, and visual impact. Keep it professional."""
-
-        try:
-            palette_desc = self._generate_with_model(prompt, max_length=100)
-        except:
+        if palette_desc is None:
             palette_desc = f"Balanced distribution of {', '.join(colors)} to create visual harmony and spatial definition."
 
         section += f"Selected Colors: {', '.join(colors)}\n\n"
@@ -213,37 +440,31 @@ Describe distribution, balance, and visual impact. Keep it professional."""
 
         return section
 
-    def _generate_installation(self, style: str, context: Dict) -> str:
+    def _generate_installation(
+        self, style: str, context: Dict, installation: Optional[str]
+    ) -> str:
         """Generate installation pattern section."""
         section = "INSTALLATION PATTERN\n" + "-" * 60 + "\n\n"
 
-        prompt = f"""Describe installation patterns and techniques for {style} style architecture.
-Include layout, joint treatment, and special techniques. Be specific and technical."""
-
-        try:
-            installation = self._generate_with_model(prompt, max_length=120)
-        except:
+        if installation is None:
             installation = "Follow standard installation practices with attention to alignment, spacing, and proper sealing."
 
         section += installation
 
         return section
 
-    def _generate_technical(self, space: str, context: Dict) -> str:
+    def _generate_technical(
+        self, space: str, context: Dict, technical: Optional[str]
+    ) -> str:
         """Generate technical specifications section."""
         considerations = context.get("considerations", [])
 
         section = "TECHNICAL SPECIFICATIONS\n" + "-" * 60 + "\n\n"
 
-        space_name = space.replace("_", " ").title()
-        prompt = f"""List technical requirements for {space_name} construction.
-Include structural, weather protection, and maintenance needs. Be specific."""
-
-        try:
-            technical = self._generate_with_model(prompt, max_length=120)
-            section += f"{technical}\n\n"
-        except:
+        if technical is None:
             section += f"Standard technical requirements apply.\n\n"
+        else:
+            section += f"{technical}\n\n"
 
         if considerations:
             section += "Key Considerations:\n"
@@ -262,19 +483,12 @@ Include structural, weather protection, and maintenance needs. Be specific."""
 
         size_range = context.get("size_range", "")
 
-        prices = []
-        for mat in materials[:3]:
-            price_str = mat.get("price_range", "")
-            if price_str:
-                try:
-                    price_parts = price_str.replace("$", "").split("-")
-                    if len(price_parts) == 2:
-                        avg_price = (
-                            float(price_parts[0]) + float(price_parts[1].split("/")[0])
-                        ) / 2
-                        prices.append(avg_price)
-                except:
-                    pass
+        # Averages are parsed once by the catalog index
+        prices = [
+            mat["price_avg"]
+            for mat in materials[:3]
+            if mat.get("price_avg") is not None
+        ]
 
         if prices:
             avg_budget = sum(prices) / len(prices)
@@ -317,6 +531,7 @@ Include structural, weather protection, and maintenance needs. Be specific."""
                     "texture": m.get("texture", ""),
                     "finish": m.get("finish", ""),
                     "price_range": m.get("price_range", ""),
+                    "price_avg": self._price_avg(m),
                 }
                 for m in materials[:3]
             ]
@@ -331,6 +546,10 @@ Include structural, weather protection, and maintenance needs. Be specific."""
 
         return context
 
+    def _price_avg(self, material: Dict) -> Optional[float]:
+        record = self.catalog_index.record(material)
+        return record.price_avg if record is not None else None
+
     def _template_overview(
         self, style: str, space: str, size: str, colors: List[str], context: Dict
     ) -> str:
@@ -0,0 +1,161 @@
+import contextlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class _GenerationRequest:
+    def __init__(self, prompt: str, generate_kwargs: Dict[str, Any]) -> None:
+        self.prompt = prompt
+        self.generate_kwargs = generate_kwargs
+        self.future: Future = Future()
+
+    def group_key(self) -> Tuple:
+        return tuple(sorted(self.generate_kwargs.items()))
+
+
+class GenerationBatcher:
+    """
+    Micro-batching scheduler in front of a seq2seq model.
+    Prompts submitted within a short window are padded into one batch and
+    run through a single generate() call; each caller gets its own decoded text.
+    Only prompts with identical generation settings share a batch.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        model: Any,
+        device: str,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        max_input_length: int = 512,
+        precision_context: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.max_input_length = max_input_length
+        self.precision_context = precision_context or contextlib.nullcontext
+
+        if window_ms is None:
+            window_ms = float(os.environ.get("GENERATION_BATCH_WINDOW_MS", "10"))
+        if max_batch_size is None:
+            max_batch_size = int(os.environ.get("GENERATION_MAX_BATCH_SIZE", "8"))
+
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_batch_size = max(max_batch_size, 1)
+
+        self._queue: "queue.Queue[Optional[_GenerationRequest]]" = queue.Queue()
+        self._closed = False
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._worker, name="generation-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, prompt: str, **generate_kwargs: Any) -> Future:
+        """Queue a prompt and return a future with the decoded text."""
+        request = _GenerationRequest(prompt, generate_kwargs)
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("GenerationBatcher is closed")
+            self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt: str, **generate_kwargs: Any) -> str:
+        """Blocking wrapper around submit()."""
+        return self.submit(prompt, **generate_kwargs).result()
+
+    def close(self) -> None:
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=5)
+
+        # Whatever is still queued will never run: fail it instead of
+        # leaving its caller waiting forever
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and not request.future.done():
+                request.future.set_exception(
+                    RuntimeError("GenerationBatcher is closed")
+                )
+        if self._thread.is_alive():
+            # Still finishing a batch; let it stop after that
+            self._queue.put(None)
+
+    def _worker(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            pending = [first]
+            stop = False
+            deadline = time.monotonic() + self.window
+
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        request = self._queue.get(timeout=remaining)
+                    else:
+                        request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if request is None:
+                    stop = True
+                    break
+                pending.append(request)
+
+            groups: Dict[Tuple, List[_GenerationRequest]] = {}
+            for request in pending:
+                # A bad request (e.g. unhashable kwargs) fails on its own
+                # instead of taking the worker thread down
+                try:
+                    groups.setdefault(request.group_key(), []).append(request)
+                except Exception as e:
+                    request.future.set_exception(e)
+
+            for requests in groups.values():
+                self._run_batch(requests)
+
+            if stop:
+                return
+
+    def _run_batch(self, requests: List[_GenerationRequest]) -> None:
+        import torch
+
+        prompts = [request.prompt for request in requests]
+        generate_kwargs = requests[0].generate_kwargs
+
+        try:
+            inputs = self.tokenizer(
+                prompts,
+                return_tensors="pt",
+                padding=True,
+                max_length=self.max_input_length,
+                truncation=True,
+            ).to(self.device)
+
+            with torch.no_grad(), self.precision_context():
+                outputs = self.model.generate(**inputs, **generate_kwargs)
+
+            texts = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        for request, text in zip(requests, texts):
+            request.future.set_result(text.strip())
@@ -0,0 +1,117 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+
+# Memory controls for diffusion renders, cheapest first. Each level includes
+# the ones before it; sequential offload only exists on CUDA.
+MEMORY_LEVELS = [
+    "none",
+    "attention_slicing",
+    "vae_slicing",
+    "vae_tiling",
+    "sequential_offload",
+]
+
+# Rough share of the per-image activation memory left at each level
+_LEVEL_ACTIVATION = {
+    "none": 1.0,
+    "attention_slicing": 0.6,
+    "vae_slicing": 0.45,
+    "vae_tiling": 0.3,
+    "sequential_offload": 0.3,
+}
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Resident set size of this process in MB, or None when it cannot be
+    measured (no procfs, psutil or resource module, e.g. Windows without
+    psutil).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import psutil  # type: ignore[import-not-found]
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Only the peak so far (KiB on Linux, bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def round_mb(value: Optional[float]) -> Optional[float]:
+    """Round a measurement in MB for reports, keeping None (unknown)."""
+    return None if value is None else round(value, 1)
+
+
+def choose_memory_level(
+    headroom_mb: float, per_image_mb: float, device: str
+) -> Tuple[str, int]:
+    """
+    Cheapest memory level whose estimated per-image activation memory fits
+    in headroom_mb, plus how many images fit in one batch at that level.
+    If nothing fits, the strictest level and 0 images are returned.
+    """
+    levels: List[str] = [
+        level
+        for level in MEMORY_LEVELS
+        if level != "sequential_offload" or device == "cuda"
+    ]
+
+    for level in levels:
+        image_mb = per_image_mb * _LEVEL_ACTIVATION[level]
+        if image_mb <= headroom_mb:
+            return level, max(1, int(headroom_mb // image_mb))
+
+    return levels[-1], 0
+
+
+class PeakRSSSampler:
+    """
+    Context manager that samples the process RSS on a background thread and
+    keeps the peak (ru_maxrss only ever reports the peak since startup).
+    start_mb and peak_mb stay None where the RSS cannot be measured.
+    """
+
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+        self.start_mb: Optional[float] = None
+        self.peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="rss-sampler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._update()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._update()
+
+    def _update(self) -> None:
+        rss = current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
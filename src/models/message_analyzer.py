@@ -0,0 +1,173 @@
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Keyword groups matched as substrings of the accent-normalized message
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "water_area": ["piscina", "pool", "spa", "jacuzzi", "alberca"],
+    "bathroom": ["baño", "bath", "ducha", "shower"],
+    "paint": ["pintura", "paint", "pintar"],
+    "exterior": ["exterior", "afuera", "outside", "fachada"],
+    "flooring": ["piso", "floor", "suelo"],
+    "outdoor": ["exterior", "outdoor", "terraza", "balcon", "patio"],
+    "modern": ["moderno"],
+    "spec_request": [
+        "especificacion",
+        "specification",
+        "diseño completo",
+        "complete design",
+        "proyecto",
+        "project",
+        "render",
+        "visualizacion",
+        "generar diseño",
+    ],
+}
+
+# Space detection for full specifications, in priority order
+SPACE_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("bathroom", ["baño", "bathroom"]),
+    ("kitchen", ["cocina", "kitchen"]),
+    ("living_room", ["sala", "living"]),
+]
+
+# Style used for a full specification when several are mentioned, in
+# priority order; other catalog styles only win when none of these appear
+STYLE_PRIORITY: Tuple[str, ...] = ("rustic", "industrial", "brutalism")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercase and strip accents so "Cerámica" matches "ceramica".
+    The tilde of ñ is kept: it is a separate letter, and without it "baño"
+    would match inside "urbano".
+    """
+    chars: List[str] = []
+    for c in unicodedata.normalize("NFKD", text.lower()):
+        if unicodedata.combining(c) and not (c == "\u0303" and chars[-1:] == ["n"]):
+            continue
+        chars.append(c)
+    return unicodedata.normalize("NFC", "".join(chars))
+
+
+@dataclass(frozen=True)
+class MessageAnalysis:
+    """Everything the chat pipeline needs to know about one message."""
+
+    normalized: str
+    tags: FrozenSet[str]
+    styles: Tuple[str, ...]
+    space: Optional[str]
+
+    @property
+    def on_topic(self) -> bool:
+        return "topic" in self.tags
+
+    @property
+    def style(self) -> Optional[str]:
+        for style in STYLE_PRIORITY:
+            if style in self.styles:
+                return style
+        return self.styles[0] if self.styles else None
+
+    @property
+    def spec_request(self) -> bool:
+        return "spec_request" in self.tags
+
+    def has(self, category: str) -> bool:
+        return category in self.tags
+
+
+class _KeywordAutomaton:
+    """Aho-Corasick automaton reporting the tags of every keyword found."""
+
+    def __init__(self, keywords: Dict[str, Set[str]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[FrozenSet[str]] = [frozenset()]
+
+        for keyword, tags in keywords.items():
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(frozenset())
+                state = next_state
+            self._out[state] = self._out[state] | frozenset(tags)
+
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] = (
+                    self._out[next_state] | self._out[self._fail[next_state]]
+                )
+
+    def scan(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._out[state]:
+                found |= self._out[state]
+        return found
+
+
+class MessageAnalyzer:
+    """
+    Precompiled single-pass keyword analyzer.
+    Built once at startup; analyze() walks the message once regardless of
+    how many keywords, categories and styles are configured.
+    """
+
+    def __init__(
+        self, topic_keywords: Iterable[str], style_names: Iterable[str]
+    ) -> None:
+        self.style_names = tuple(style_names)
+
+        keywords: Dict[str, Set[str]] = {}
+
+        def add(keyword: str, tag: str) -> None:
+            keywords.setdefault(normalize_text(keyword), set()).add(tag)
+
+        for keyword in topic_keywords:
+            add(keyword, "topic")
+        for category, category_keywords in CATEGORY_KEYWORDS.items():
+            for keyword in category_keywords:
+                add(keyword, category)
+        for style in self.style_names:
+            add(style, f"style:{style}")
+        for space, space_keywords in SPACE_KEYWORDS:
+            for keyword in space_keywords:
+                add(keyword, f"space:{space}")
+
+        self._automaton = _KeywordAutomaton(keywords)
+
+    def analyze(self, message: str) -> MessageAnalysis:
+        normalized = normalize_text(message)
+        tags = self._automaton.scan(normalized)
+
+        styles = tuple(s for s in self.style_names if f"style:{s}" in tags)
+        space = next(
+            (s for s, _ in SPACE_KEYWORDS if f"space:{s}" in tags),
+            None,
+        )
+
+        return MessageAnalysis(
+            normalized=normalized,
+            tags=frozenset(tags),
+            styles=styles,
+            space=space,
+        )
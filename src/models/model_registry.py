@@ -0,0 +1,501 @@
+import contextlib
+import os
+import shutil
+import threading
+import warnings
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+from models.model_store import resolve_model
+
+# torch, transformers and diffusers are imported where they are used, so
+# importing this module (and the CLI/API on top of it) stays cheap
+
+
+class ModelRegistry:
+    """
+    Process-wide store of loaded models.
+    Every model is loaded once per key and shared by reference count, so
+    several model classes asking for the same weights get the same objects.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Dict[str, Any]] = {}
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the shared value for key, loading it on first use."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "value": None,
+                    "refs": 0,
+                    "lock": threading.Lock(),
+                    "use_lock": threading.RLock(),
+                }
+                self._entries[key] = entry
+            entry["refs"] += 1
+
+        # Load outside the registry lock so unrelated keys can load in parallel
+        with entry["lock"]:
+            if entry["value"] is None:
+                try:
+                    entry["value"] = loader()
+                except Exception:
+                    self.release(key)
+                    raise
+
+        return entry["value"]
+
+    def release(self, key: Hashable) -> None:
+        """Drop one reference to key and unload it when nobody uses it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+
+            entry["refs"] -= 1
+            if entry["refs"] > 0:
+                return
+
+            del self._entries[key]
+
+        value = entry["value"]
+        if value is not None and hasattr(value, "close"):
+            value.close()
+
+    def use_lock(self, key: Hashable) -> Any:
+        """
+        Lock for values that are not safe to call from several threads at
+        once; everyone sharing key's value shares the lock.
+        """
+        with self._lock:
+            return self._entries[key]["use_lock"]
+
+    def stats(self) -> Dict[str, int]:
+        """Reference counts of currently loaded keys."""
+        with self._lock:
+            return {
+                repr(key): entry["refs"]
+                for key, entry in self._entries.items()
+                if entry["value"] is not None
+            }
+
+
+class SharedSeq2Seq:
+    """Tokenizer/model pair handed out by the registry."""
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        model: Any,
+        device: str,
+        dtype: str,
+        backend: str = "torch",
+    ) -> None:
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.dtype = dtype
+        self.backend = backend
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+
+    @property
+    def batcher(self) -> Any:
+        """Micro-batching scheduler shared by every user of this model."""
+        with self._batcher_lock:
+            if self._batcher is None:
+                from models.generation_batcher import GenerationBatcher
+
+                self._batcher = GenerationBatcher(
+                    self.tokenizer,
+                    self.model,
+                    self.device,
+                    precision_context=self.precision_context,
+                )
+            return self._batcher
+
+    def precision_context(self) -> Any:
+        """bfloat16 mode keeps fp32 weights and runs generate() under autocast."""
+        if self.dtype == "bfloat16":
+            import torch
+
+            device_type = "cuda" if self.device.startswith("cuda") else "cpu"
+            return torch.autocast(device_type=device_type, dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    def submit(self, prompt: str, **generate_kwargs: Any) -> Future:
+        return self.batcher.submit(prompt, **generate_kwargs)
+
+    def generate(self, prompt: str, **generate_kwargs: Any) -> str:
+        return self.batcher.generate(prompt, **generate_kwargs)
+
+    def stream(self, prompt: str, **generate_kwargs: Any) -> Iterator[str]:
+        """
+        Yield decoded text pieces as generate() produces tokens.
+        Runs unbatched; streaming needs num_beams=1.
+        """
+        import torch
+        from transformers import (
+            StoppingCriteria,
+            StoppingCriteriaList,
+            TextIteratorStreamer,
+        )
+
+        inputs = self.tokenizer(
+            prompt, return_tensors="pt", max_length=512, truncation=True
+        ).to(self.device)
+        streamer = TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True
+        )
+        errors = []
+        closed = threading.Event()
+
+        class StopWhenClosed(StoppingCriteria):
+            def __call__(self, input_ids: Any, scores: Any, **kwargs: Any) -> Any:
+                return torch.full(
+                    (input_ids.shape[0],),
+                    closed.is_set(),
+                    dtype=torch.bool,
+                    device=input_ids.device,
+                )
+
+        def run() -> None:
+            try:
+                with torch.no_grad(), self.precision_context():
+                    self.model.generate(
+                        **inputs,
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([StopWhenClosed()]),
+                        **generate_kwargs,
+                    )
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=run, name="generation-stream", daemon=True)
+        thread.start()
+
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            # Closed before the end (e.g. the client went away):
+            # generate() stops at its next token instead of running on
+            closed.set()
+
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    return _registry
+
+
+def default_device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+# Precision modes for seq2seq models: plain fp32, bf16 autocast over fp32
+# weights, or int8 dynamic quantization of the Linear layers (CPU only)
+SEQ2SEQ_DTYPES = ("float32", "bfloat16", "int8")
+
+
+def default_seq2seq_dtype() -> str:
+    return os.environ.get("SEQ2SEQ_DTYPE", "float32")
+
+
+# Inference backends for seq2seq models; "tiny" and "stub" need no
+# downloads (see models/tiny_backends.py)
+SEQ2SEQ_BACKENDS = ("torch", "onnx", "tiny", "stub")
+
+
+def default_seq2seq_backend() -> str:
+    return os.environ.get("MODEL_BACKEND", "torch")
+
+
+def onnx_export_dir(model_name: str) -> str:
+    """Where the ONNX export of model_name is kept (ONNX_EXPORT_DIR)."""
+    base = os.environ.get(
+        "ONNX_EXPORT_DIR", os.path.join(os.path.dirname(__file__), "../onnx_models")
+    )
+    return os.path.join(base, model_name.strip("/").replace("/", "--"))
+
+
+def seq2seq_key(
+    model_name: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Tuple[str, str, str, str, str]:
+    return (
+        "seq2seq",
+        model_name,
+        device or default_device(),
+        dtype or default_seq2seq_dtype(),
+        backend or default_seq2seq_backend(),
+    )
+
+
+def acquire_seq2seq(
+    model_name: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> SharedSeq2Seq:
+    """Get the shared FLAN-T5 style tokenizer/model pair for this configuration."""
+    key = seq2seq_key(model_name, device, dtype, backend)
+    device, dtype, backend = key[2], key[3], key[4]
+
+    if dtype not in SEQ2SEQ_DTYPES:
+        raise ValueError(
+            f"Invalid seq2seq dtype: {dtype} (expected one of {', '.join(SEQ2SEQ_DTYPES)})"
+        )
+    if dtype == "int8" and device != "cpu":
+        raise ValueError("int8 dynamic quantization is only supported on CPU")
+    if backend not in SEQ2SEQ_BACKENDS:
+        raise ValueError(
+            f"Invalid model backend: {backend} (expected one of {', '.join(SEQ2SEQ_BACKENDS)})"
+        )
+
+    def load() -> SharedSeq2Seq:
+        if backend == "tiny":
+            from models.tiny_backends import build_tiny_seq2seq
+
+            print(f"Building tiny random seq2seq model for {model_name}...")
+            return _prepare_torch_seq2seq(*build_tiny_seq2seq(), device, dtype, backend)
+        if backend == "stub":
+            from models.tiny_backends import build_stub_seq2seq
+
+            print(f"Using stub seq2seq model for {model_name}")
+            return SharedSeq2Seq(*build_stub_seq2seq(), device, dtype, backend)
+        if backend == "onnx":
+            try:
+                return _load_onnx_seq2seq(model_name, device, dtype)
+            except Exception as e:
+                print(f"ONNX backend unavailable ({e}), falling back to PyTorch")
+        return _load_torch_seq2seq(model_name, device, dtype)
+
+    return _registry.acquire(key, load)
+
+
+def _load_torch_seq2seq(model_name: str, device: str, dtype: str) -> SharedSeq2Seq:
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    path, load_kwargs = resolve_model(model_name)
+    print(f"Loading {model_name} ({dtype}) on {device}...")
+    tokenizer = AutoTokenizer.from_pretrained(
+        path, local_files_only=load_kwargs.get("local_files_only", False)
+    )
+    # Weights are memory-mapped from safetensors straight into the model,
+    # without a randomly initialized copy first
+    model = AutoModelForSeq2SeqLM.from_pretrained(
+        path, torch_dtype=torch.float32, low_cpu_mem_usage=True, **load_kwargs
+    )
+    return _prepare_torch_seq2seq(tokenizer, model, device, dtype)
+
+
+def _prepare_torch_seq2seq(
+    tokenizer: Any, model: Any, device: str, dtype: str, backend: str = "torch"
+) -> SharedSeq2Seq:
+    """Apply the precision mode to an fp32 model and move it to device."""
+    import torch
+
+    if dtype == "int8":
+        model = _quantize_int8(model)
+    model.to(device)
+    model.eval()
+    return SharedSeq2Seq(tokenizer, model, device, dtype, backend)
+
+
+def _quantize_int8(model: Any) -> Any:
+    """
+    Dynamic int8 quantization of the Linear layers. torch.ao.quantization
+    warns that it is deprecated in favour of torchao; it is validated up to
+    the torch version pinned in requirements.txt, so the warning is silenced
+    here rather than raised on every load (or turned into an error by
+    -W error::DeprecationWarning).
+    """
+    import torch
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        # The quantized tensor constructors warn as well (UserWarning)
+        warnings.filterwarnings("ignore", message=r"(?s).*quantize.*deprecated")
+        try:
+            from torch.ao.quantization import quantize_dynamic
+        except ImportError as e:
+            raise ValueError(
+                f"SEQ2SEQ_DTYPE=int8 needs torch.ao.quantization, missing in "
+                f"torch {torch.__version__}: {e}"
+            ) from e
+        return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx_seq2seq(model_name: str, device: str, dtype: str) -> SharedSeq2Seq:
+    """
+    Encoder/decoder (with past key/values) exported to ONNX and run through
+    ONNX Runtime. The first load exports into onnx_export_dir(); later loads
+    reuse those files.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM  # type: ignore[import-not-found]
+    from transformers import AutoTokenizer
+
+    if dtype != "float32":
+        raise ValueError(f"the ONNX export is float32 only (got {dtype})")
+
+    provider = "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider"
+    export_dir = onnx_export_dir(model_name)
+
+    if os.path.exists(os.path.join(export_dir, "config.json")):
+        print(f"Loading ONNX export of {model_name} from {export_dir}...")
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            export_dir, use_cache=True, provider=provider
+        )
+    else:
+        print(f"Exporting {model_name} to ONNX ({export_dir})...")
+        path, load_kwargs = resolve_model(model_name)
+        local_files_only = load_kwargs.get("local_files_only", False)
+        tokenizer = AutoTokenizer.from_pretrained(
+            path, local_files_only=local_files_only
+        )
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            path,
+            export=True,
+            use_cache=True,
+            provider=provider,
+            local_files_only=local_files_only,
+        )
+        # Write to a temporary directory first so a failed export is not reused
+        tmp_dir = f"{export_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        model.save_pretrained(tmp_dir)
+        tokenizer.save_pretrained(tmp_dir)
+        # Leftovers of an interrupted export (no config.json) would make
+        # os.replace fail on a non-empty directory
+        shutil.rmtree(export_dir, ignore_errors=True)
+        os.replace(tmp_dir, export_dir)
+
+    return SharedSeq2Seq(tokenizer, model, device, dtype, backend="onnx")
+
+
+def release_seq2seq(
+    model_name: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> None:
+    _registry.release(seq2seq_key(model_name, device, dtype, backend))
+
+
+# Diffusion backends; MODEL_BACKEND=tiny/stub applies here too unless
+# RENDER_BACKEND says otherwise
+DIFFUSION_BACKENDS = ("torch", "tiny", "stub")
+
+
+def default_diffusion_backend() -> str:
+    backend = os.environ.get("RENDER_BACKEND")
+    if backend:
+        return backend
+    model_backend = default_seq2seq_backend()
+    return model_backend if model_backend in DIFFUSION_BACKENDS else "torch"
+
+
+def diffusion_key(
+    model_id: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Tuple[str, str, str, str, str]:
+    device = device or default_device()
+    if dtype is None:
+        dtype = "float16" if device == "cuda" else "float32"
+    return (
+        "diffusion",
+        model_id,
+        device,
+        dtype,
+        backend or default_diffusion_backend(),
+    )
+
+
+def acquire_diffusion_pipeline(
+    model_id: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Any:
+    """Get the shared Stable Diffusion pipeline for this configuration."""
+    key = diffusion_key(model_id, device, dtype, backend)
+    device, dtype, backend = key[2], key[3], key[4]
+
+    if backend not in DIFFUSION_BACKENDS:
+        raise ValueError(
+            f"Invalid render backend: {backend} (expected one of {', '.join(DIFFUSION_BACKENDS)})"
+        )
+
+    def load() -> Any:
+        import torch
+
+        if backend == "stub":
+            from models.tiny_backends import build_stub_diffusion
+
+            print(f"Using stub diffusion pipeline for {model_id}")
+            return build_stub_diffusion()
+        if backend == "tiny":
+            from models.tiny_backends import build_tiny_diffusion
+
+            print(f"Building tiny random diffusion pipeline for {model_id}...")
+            return build_tiny_diffusion().to(device, getattr(torch, dtype))
+
+        from diffusers import StableDiffusionPipeline  # type: ignore[import-not-found]
+
+        path, load_kwargs = resolve_model(model_id)
+        print(f"Loading {model_id} ({dtype}) on {device}...")
+        pipe = StableDiffusionPipeline.from_pretrained(
+            path,
+            torch_dtype=getattr(torch, dtype),
+            safety_checker=None,
+            low_cpu_mem_usage=True,
+            **load_kwargs,
+        )
+        return pipe.to(device)
+
+    return _registry.acquire(key, load)
+
+
+def release_diffusion_pipeline(
+    model_id: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> None:
+    _registry.release(diffusion_key(model_id, device, dtype, backend))
+
+
+def diffusion_pipeline_lock(
+    model_id: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Any:
+    """
+    Held around every call into an acquired diffusion pipeline: its
+    tokenizer, modules and their slicing/tiling flags are shared.
+    """
+    return _registry.use_lock(diffusion_key(model_id, device, dtype, backend))
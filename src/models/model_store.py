@@ -0,0 +1,289 @@
+"""
+Local model store: pinned model snapshots plus a manifest of their files.
+
+Models are fetched once (safetensors weights, configs and tokenizers only)
+into MODEL_STORE_DIR/<model>/<revision>/ and recorded in manifest.json with
+the resolved commit and a size/sha256 per file. Loading then goes through
+resolve_model(), which points from_pretrained at the local snapshot with
+local_files_only, so startup never touches the network. Models missing
+from the store load from the Hugging Face cache, still offline, unless
+MODEL_STORE_ALLOW_DOWNLOAD=1.
+
+    python -m models.model_store prefetch
+    python -m models.model_store prefetch google/flan-t5-base --revision <commit>
+    python -m models.model_store prefetch google/flan-t5-base --from-dir ./flan-t5-base
+    python -m models.model_store verify
+    python -m models.model_store list
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MODELS = ["google/flan-t5-base", "runwayml/stable-diffusion-v1-5"]
+
+MANIFEST_FILE = "manifest.json"
+
+# What from_pretrained needs, and nothing else: no .bin/.ckpt duplicates,
+# fp16/EMA variants, single-file checkpoints or the unused safety checker
+ALLOW_PATTERNS = ["*.json", "*.txt", "*.model", "*.safetensors"]
+IGNORE_PATTERNS = ["*fp16*", "*non_ema*", "v1-5-pruned*", "safety_checker/*"]
+
+
+def store_dir() -> str:
+    return os.environ.get(
+        "MODEL_STORE_DIR", os.path.join(os.path.dirname(__file__), "../model_store")
+    )
+
+
+def _model_dir(model_name: str) -> str:
+    return model_name.strip("/").replace("/", "--")
+
+
+def load_manifest(store: Optional[str] = None) -> Dict[str, Any]:
+    path = os.path.join(store or store_dir(), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"models": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict[str, Any], store: Optional[str] = None) -> str:
+    store = store or store_dir()
+    os.makedirs(store, exist_ok=True)
+    path = os.path.join(store, MANIFEST_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def resolve_model(model_name: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Where to load model_name from, plus the from_pretrained kwargs that go
+    with it. A model in the store loads from its pinned snapshot, offline
+    and from safetensors only (memory-mapped). Any other model loads by hub
+    name from the local Hugging Face cache only; MODEL_STORE_ALLOW_DOWNLOAD=1
+    lets it download, MODEL_STORE_REQUIRED=1 refuses it.
+    """
+    store = store_dir()
+    entry = load_manifest(store)["models"].get(model_name)
+    if entry is not None:
+        path = os.path.join(store, entry["path"])
+        if os.path.isdir(path):
+            return path, {"local_files_only": True, "use_safetensors": True}
+        print(f"Model store entry for {model_name} is missing its files ({path})")
+
+    if os.environ.get("MODEL_STORE_REQUIRED", "0") == "1":
+        raise FileNotFoundError(
+            f"{model_name} is not in the model store ({store}); "
+            f"run: python -m models.model_store prefetch {model_name}"
+        )
+
+    if os.environ.get("MODEL_STORE_ALLOW_DOWNLOAD", "0") == "1":
+        print(f"{model_name} is not in the model store, downloading it if needed")
+        return model_name, {}
+
+    print(
+        f"{model_name} is not in the model store, loading it from the Hugging Face "
+        f"cache without network access (run: python -m models.model_store prefetch "
+        f"{model_name}, or set MODEL_STORE_ALLOW_DOWNLOAD=1)"
+    )
+    return model_name, {"local_files_only": True}
+
+
+def _wanted(relative_path: str) -> bool:
+    return any(fnmatch.fnmatch(relative_path, p) for p in ALLOW_PATTERNS) and not any(
+        fnmatch.fnmatch(relative_path, p) for p in IGNORE_PATTERNS
+    )
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _list_files(root: str) -> List[str]:
+    files = []
+    for directory, subdirs, names in os.walk(root):
+        # Skip hub download bookkeeping (.cache/huggingface)
+        subdirs[:] = [d for d in subdirs if not d.startswith(".")]
+        for name in names:
+            files.append(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(f.replace(os.sep, "/") for f in files)
+
+
+def prefetch(
+    model_name: str,
+    revision: Optional[str] = None,
+    from_dir: Optional[str] = None,
+    update: bool = False,
+) -> Dict[str, Any]:
+    """
+    Put model_name into the store and record it in the manifest.
+    An entry already in the store keeps its pinned revision unless a
+    revision is given or update is set. from_dir copies a local snapshot
+    instead of downloading (air-gapped hosts).
+    """
+    store = store_dir()
+    manifest = load_manifest(store)
+    entry = manifest["models"].get(model_name)
+
+    if entry is not None and not update and revision in (None, entry["revision"]):
+        if not verify_model(model_name, entry, store):
+            print(f"{model_name} already in store at revision {entry['revision']}")
+            return entry
+        print(f"{model_name} failed verification, fetching it again")
+        revision = entry["revision"]
+
+    if from_dir is not None:
+        revision = revision or "local"
+        target = os.path.join(store, _model_dir(model_name), revision)
+        tmp_target = f"{target}.tmp"
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        for relative_path in _list_files(from_dir):
+            if _wanted(relative_path):
+                os.makedirs(
+                    os.path.dirname(os.path.join(tmp_target, relative_path)),
+                    exist_ok=True,
+                )
+                shutil.copy2(
+                    os.path.join(from_dir, relative_path),
+                    os.path.join(tmp_target, relative_path),
+                )
+    else:
+        from huggingface_hub import HfApi, snapshot_download
+
+        # Pin the branch/tag to the commit it points at right now
+        revision = HfApi().model_info(model_name, revision=revision or "main").sha
+        target = os.path.join(store, _model_dir(model_name), revision)
+        tmp_target = f"{target}.tmp"
+        print(f"Downloading {model_name}@{revision}...")
+        snapshot_download(
+            model_name,
+            revision=revision,
+            local_dir=tmp_target,
+            allow_patterns=ALLOW_PATTERNS,
+            ignore_patterns=IGNORE_PATTERNS,
+        )
+        shutil.rmtree(os.path.join(tmp_target, ".cache"), ignore_errors=True)
+
+    files = {}
+    for relative_path in _list_files(tmp_target):
+        full_path = os.path.join(tmp_target, relative_path)
+        files[relative_path] = {
+            "size": os.path.getsize(full_path),
+            "sha256": _sha256(full_path),
+        }
+    if not any(f.endswith(".safetensors") for f in files):
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        raise ValueError(f"{model_name}@{revision} has no safetensors weights")
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_target, target)
+
+    entry = {
+        "revision": revision,
+        "path": os.path.relpath(target, store).replace(os.sep, "/"),
+        "files": files,
+        "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    manifest["models"][model_name] = entry
+    save_manifest(manifest, store)
+
+    total_mb = sum(f["size"] for f in files.values()) / (1024 * 1024)
+    print(f"{model_name}@{revision}: {len(files)} files, {total_mb:.0f} MB")
+    return entry
+
+
+def verify_model(
+    model_name: str, entry: Dict[str, Any], store: Optional[str] = None
+) -> List[str]:
+    """Problems with one stored model (missing, resized or altered files)."""
+    root = os.path.join(store or store_dir(), entry["path"])
+    problems = []
+    for relative_path, expected in entry["files"].items():
+        path = os.path.join(root, relative_path)
+        if not os.path.exists(path):
+            problems.append(f"{relative_path}: missing")
+        elif os.path.getsize(path) != expected["size"]:
+            problems.append(f"{relative_path}: size mismatch")
+        elif _sha256(path) != expected["sha256"]:
+            problems.append(f"{relative_path}: checksum mismatch")
+    return problems
+
+
+def verify(model_names: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    store = store_dir()
+    models = load_manifest(store)["models"]
+    results = {}
+    for model_name in model_names or DEFAULT_MODELS:
+        entry = models.get(model_name)
+        if entry is None:
+            results[model_name] = ["not in store"]
+        else:
+            results[model_name] = verify_model(model_name, entry, store)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local model store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prefetch_parser = commands.add_parser(
+        "prefetch", help="Download models into the store and pin their revision"
+    )
+    prefetch_parser.add_argument("models", nargs="*", default=DEFAULT_MODELS)
+    prefetch_parser.add_argument(
+        "--revision", default=None, help="Branch, tag or commit (default: main)"
+    )
+    prefetch_parser.add_argument(
+        "--from-dir", default=None, help="Copy a local snapshot instead of downloading"
+    )
+    prefetch_parser.add_argument(
+        "--update", action="store_true", help="Re-pin to the latest revision"
+    )
+
+    verify_parser = commands.add_parser("verify", help="Check stored files")
+    verify_parser.add_argument("models", nargs="*", default=None)
+
+    commands.add_parser("list", help="Show stored models")
+
+    args = parser.parse_args()
+    print(f"Model store: {os.path.abspath(store_dir())}")
+
+    if args.command == "prefetch":
+        if args.from_dir and len(args.models) != 1:
+            parser.error("--from-dir takes exactly one model")
+        for model_name in args.models:
+            prefetch(model_name, args.revision, args.from_dir, args.update)
+
+    elif args.command == "verify":
+        results = verify(args.models)
+        for model_name, problems in results.items():
+            print(f"{model_name}: {'OK' if not problems else 'FAILED'}")
+            for problem in problems:
+                print(f"  {problem}")
+        if any(results.values()):
+            sys.exit(1)
+
+    else:
+        for model_name, entry in load_manifest()["models"].items():
+            total_mb = sum(f["size"] for f in entry["files"].values()) / (1024 * 1024)
+            print(
+                f"{model_name}@{entry['revision']}  {total_mb:.0f} MB  "
+                f"({entry['fetched_at']})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Optional
+
+
+class RenderCache:
+    """
+    Disk-backed, content-addressed cache of rendered images.
+    Files are named by the hash of every input that affects the pixels
+    (prompt, negative prompt, steps, guidance, resolution, seed, model,
+    scheduler).
+    Total size is capped; the least recently used files are evicted first.
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_mb: Optional[float] = None
+    ) -> None:
+        if directory is None:
+            directory = os.environ.get(
+                "RENDER_CACHE_DIR",
+                os.path.join(os.path.dirname(__file__), "../outputs/render_cache"),
+            )
+        if max_mb is None:
+            max_mb = float(os.environ.get("RENDER_CACHE_MAX_MB", "2048"))
+
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached file for key (and mark it recently used)."""
+        path = self.path_for(key)
+        with self._lock:
+            if not os.path.exists(path):
+                self.misses += 1
+                return None
+            os.utime(path)
+            self.hits += 1
+            return path
+
+    def put(self, key: str, image: Any) -> str:
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, format="PNG")
+
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._evict()
+
+        return path
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".png"):
+                continue
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        # Always keep the newest entry, even if it alone exceeds the cap
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,8 +1,52 @@
 import torch
-from diffusers import StableDiffusionPipeline  # type: ignore[import-not-found]
+import torch.nn.functional as F
 from PIL import Image
+import contextlib
+import math
+import numpy as np
 import os
-from typing import Optional, List, Tuple
+import secrets
+import shutil
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, List, Tuple
+from models.memory import (
+    MEMORY_LEVELS,
+    PeakRSSSampler,
+    choose_memory_level,
+    current_rss_mb,
+    round_mb,
+)
+from models.render_cache import RenderCache
+from models.response_cache import ResponseCache
+from models.schedulers import (
+    default_scheduler_name,
+    make_scheduler,
+    recommended_steps,
+)
+from models.model_registry import (
+    acquire_diffusion_pipeline,
+    default_device,
+    default_diffusion_backend,
+    diffusion_pipeline_lock,
+    release_diffusion_pipeline,
+)
+
+# Full renders default to 768x768; previews are rendered at 1/PREVIEW_FACTOR
+# of the final size with at most PREVIEW_STEPS steps
+DEFAULT_RESOLUTION = 768
+PREVIEW_FACTOR = 2
+PREVIEW_STEPS = 10
+
+# High-resolution mode: the base render is upscaled and refined with
+# img2img in overlapping tiles of a fixed size
+HIGHRES_TILE_SIZE = 512
+HIGHRES_OVERLAP = 64
+HIGHRES_STRENGTH = 0.35
+
+# Rough activation memory for one fp32 512x512 image (with CFG) in a batch
+IMAGE_MEMORY_MB_512 = 1200
+
+NEGATIVE_PROMPT = "blurry, low quality, distorted, cartoon, anime, painting, sketch, unrealistic, oversaturated, people, humans, text, watermark, signature"
 
 
 class RenderGenerator:
@@ -10,26 +54,130 @@ class RenderGenerator:
         self,
         model_id: str = "runwayml/stable-diffusion-v1-5",
         device: Optional[str] = None,
+        cache: Optional[RenderCache] = None,
+        use_cache: bool = True,
+        batch_memory_mb: Optional[float] = None,
+        embedding_cache_size: Optional[int] = None,
+        scheduler: Optional[str] = None,
+        height: int = DEFAULT_RESOLUTION,
+        width: int = DEFAULT_RESOLUTION,
+        memory_budget_mb: Optional[float] = None,
+        backend: Optional[str] = None,
     ) -> None:
-        if device is None:
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        else:
-            self.device = device
+        self.model_id = model_id
+        self.device = device or default_device()
+        # "tiny"/"stub" need no downloads (RENDER_BACKEND, see tiny_backends)
+        self.backend = backend or default_diffusion_backend()
+        # Their renders must never be served for the real model's
+        self._cache_model_id = (
+            model_id if self.backend == "torch" else f"{model_id}:{self.backend}"
+        )
+        self.height, self.width = self._check_size(height, width)
+
+        # Memory budget for batched renders (generate_renders)
+        if batch_memory_mb is None:
+            batch_memory_mb = float(os.environ.get("RENDER_BATCH_MEMORY_MB", "8192"))
+        self.batch_memory_mb = batch_memory_mb
+
+        # Process-wide RSS budget; memory controls are picked per batch
+        if memory_budget_mb is None and os.environ.get("RENDER_MEMORY_BUDGET_MB"):
+            memory_budget_mb = float(os.environ["RENDER_MEMORY_BUDGET_MB"])
+        self.memory_budget_mb = memory_budget_mb
+        self.memory_level = "none"
+        # Per thread, so concurrent render workers each read their own stats
+        self._local = threading.local()
+
+        # Called with the step index after every denoising step (benchmarks)
+        self.step_callback: Optional[Callable[[int], None]] = None
+
+        # Content-addressed cache of finished renders (RENDER_CACHE_DIR)
+        if cache is None and use_cache:
+            cache = RenderCache()
+        self.cache = cache
 
         print(f"Loading Stable Diffusion on {self.device}...")
 
-        self.pipe = StableDiffusionPipeline.from_pretrained(
-            model_id,
-            torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-            safety_checker=None,
+        self._base_pipe = acquire_diffusion_pipeline(
+            model_id, self.device, backend=self.backend
+        )
+        # The tokenizer, scheduler state and modules are not thread-safe:
+        # pipeline calls from every generator sharing them take turns
+        self._pipe_lock = diffusion_pipeline_lock(
+            model_id, self.device, backend=self.backend
+        )
+
+        # Own pipeline object over the shared modules, so this generator can
+        # swap schedulers without affecting other users of the weights
+        self.pipe = type(self._base_pipe)(
+            **self._base_pipe.components, requires_safety_checker=False
         )
-        self.pipe = self.pipe.to(self.device)
+        self.set_scheduler(scheduler or default_scheduler_name())
 
         if self.device == "cuda":
-            self.pipe.enable_attention_slicing()
+            with self._pipe_lock:
+                self._set_memory_level("attention_slicing")
+
+        # Text-encoder outputs keyed on (model_id, prompt); prompts come from a
+        # small fixed vocabulary, so most renders skip the CLIP encoder
+        self.embedding_cache = None
+        if getattr(self.pipe, "text_encoder", None) is not None:
+            if embedding_cache_size is None:
+                embedding_cache_size = int(
+                    os.environ.get("RENDER_EMBEDDING_CACHE_SIZE", "256")
+                )
+            self.embedding_cache = ResponseCache(embedding_cache_size, None)
+            # The negative prompt never changes: encode it once at load
+            self._prompt_embeds(NEGATIVE_PROMPT)
 
         print("Model loaded successfully")
 
+    @property
+    def last_render_stats(self) -> Optional[Dict]:
+        """Images, peak RSS and memory controls of this thread's last render."""
+        return getattr(self._local, "render_stats", None)
+
+    @last_render_stats.setter
+    def last_render_stats(self, stats: Optional[Dict]) -> None:
+        self._local.render_stats = stats
+
+    def close(self) -> None:
+        """Release this instance's reference to the shared pipeline."""
+        if self.pipe is not None:
+            release_diffusion_pipeline(self.model_id, self.device, backend=self.backend)
+            self.pipe = None
+            self._base_pipe = None
+
+    def warmup(self, size: int = 64, steps: int = 2) -> None:
+        """
+        One tiny throwaway pass through text encoder, UNet and VAE so kernel
+        and allocator setup is paid before the first real render. Nothing
+        is cached or saved.
+        """
+        self._check_size(size, size)
+        prompt_inputs = self._prompt_inputs(
+            ["architectural facade, exterior view"], [NEGATIVE_PROMPT]
+        )
+        with self._pipe_lock, torch.inference_mode():
+            self._apply_memory_level()
+            self.pipe(
+                **prompt_inputs,
+                height=size,
+                width=size,
+                num_inference_steps=steps,
+                guidance_scale=7.5,
+            )
+
+    def set_scheduler(self, name: str) -> None:
+        """
+        Switch to a scheduler preset (see models/schedulers.py) without
+        reloading the pipeline. Renders without an explicit step count use
+        the preset's recommended steps.
+        """
+        self.pipe.scheduler = make_scheduler(name, self._base_pipe.scheduler)
+        self.scheduler_name = name
+        self.default_steps = recommended_steps(name)
+        print(f"Scheduler: {name} ({self.default_steps} steps by default)")
+
     def _build_prompt(
         self,
         style: str,
@@ -67,9 +215,7 @@ class RenderGenerator:
 
         base_prompt += ", photorealistic, high quality, architectural digest style, professional photography, 8k, detailed textures, realistic materials"
 
-        negative_prompt = "blurry, low quality, distorted, cartoon, anime, painting, sketch, unrealistic, oversaturated, people, humans, text, watermark, signature"
-
-        return base_prompt, negative_prompt
+        return base_prompt, NEGATIVE_PROMPT
 
     def generate_render(
         self,
@@ -79,38 +225,596 @@ class RenderGenerator:
         colors: Optional[List[str]] = None,
         output_dir: str = "outputs/renders",
         filename: Optional[str] = None,
-        num_inference_steps: int = 50,
+        num_inference_steps: Optional[int] = None,
         guidance_scale: float = 7.5,
+        seed: Optional[int] = None,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
     ) -> Tuple[Image.Image, str]:
 
-        os.makedirs(output_dir, exist_ok=True)
+        request = {
+            "style": style,
+            "space": space,
+            "specification": specification,
+            "colors": colors,
+            "filename": filename,
+            "num_inference_steps": num_inference_steps,
+            "guidance_scale": guidance_scale,
+            "seed": seed,
+            "height": height,
+            "width": width,
+        }
+        return self.generate_renders([request], output_dir=output_dir)[0]
+
+    def generate_preview(
+        self,
+        style: str,
+        space: str,
+        specification: str,
+        colors: Optional[List[str]] = None,
+        output_dir: str = "outputs/renders",
+        filename: Optional[str] = None,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: float = 7.5,
+        seed: Optional[int] = None,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
+    ) -> Tuple[Image.Image, str, int]:
+        """
+        Quick low-resolution, low-step draft of a render.
+        height/width are the size of the final render. The preview starts
+        from that render's seeded noise, downsampled, so its composition
+        follows the final one; call generate_render with the returned seed
+        (and the same size) to get the full render.
+
+        Returns (image, path, seed).
+        """
+        if seed is None:
+            seed = secrets.randbelow(2**31)
+
+        request = {
+            "style": style,
+            "space": space,
+            "specification": specification,
+            "colors": colors,
+            "filename": filename,
+            "num_inference_steps": num_inference_steps,
+            "guidance_scale": guidance_scale,
+            "seed": seed,
+            "height": height,
+            "width": width,
+            "preview": True,
+        }
+        image, path = self.generate_renders([request], output_dir=output_dir)[0]
+        return image, path, seed
+
+    def generate_highres(
+        self,
+        style: str,
+        space: str,
+        specification: str,
+        colors: Optional[List[str]] = None,
+        output_dir: str = "outputs/renders",
+        filename: Optional[str] = None,
+        target_size: int = 2048,
+        tile_size: int = HIGHRES_TILE_SIZE,
+        overlap: int = HIGHRES_OVERLAP,
+        strength: float = HIGHRES_STRENGTH,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: float = 7.5,
+        seed: Optional[int] = None,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
+    ) -> Tuple[Image.Image, str]:
+        """
+        Print-size render whose long side is target_size pixels.
+        A base render (height x width, default the generator size) is
+        upscaled, then refined tile by tile with img2img (low strength keeps
+        the composition). Tiles overlap and are feather-blended into the
+        output. Every tile is a fixed-size UNet pass with tiled VAE decode, so peak memory does not
+        grow with target_size.
+        """
+        if tile_size % 8 or not 0 < overlap < tile_size:
+            raise ValueError(
+                "tile_size must be a multiple of 8 and overlap smaller than it"
+            )
+        if not 0 < strength <= 1:
+            raise ValueError(f"strength must be in (0, 1] (got {strength})")
+        if seed is None:
+            seed = secrets.randbelow(2**31)
+        steps = num_inference_steps or self.default_steps
+        # img2img only runs int(steps * strength) of the steps; with few
+        # steps that is 0 and the pipeline has nothing to denoise
+        refine_steps = max(steps, math.ceil(1 / strength))
+        if refine_steps != steps:
+            print(f"Refining tiles with {refine_steps} steps (1 effective step)")
+
+        base, _ = self.generate_render(
+            style,
+            space,
+            specification,
+            colors,
+            output_dir=output_dir,
+            num_inference_steps=steps,
+            guidance_scale=guidance_scale,
+            seed=seed,
+            height=height,
+            width=width,
+        )
 
+        width, height = self._highres_size(base.size, target_size, tile_size)
         prompt, negative_prompt = self._build_prompt(
             style, space, specification, colors
         )
+        key = RenderCache.make_key(
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            steps=steps,
+            guidance=guidance_scale,
+            height=base.size[1],
+            width=base.size[0],
+            seed=seed,
+            model_id=self._cache_model_id,
+            scheduler=self.scheduler_name,
+            highres=(width, height, tile_size, overlap, strength),
+        )
+
+        os.makedirs(output_dir, exist_ok=True)
+        if filename is None:
+            filename = f"{style}_{space}_{key[:16]}_{width}x{height}.png"
+        path = os.path.join(output_dir, filename)
+
+        cached_path = self.cache.get(key) if self.cache is not None else None
+        if cached_path is not None:
+            print(f"Render cache hit: {key[:16]}")
+            return self._load_cached(cached_path, path), path
+
+        tiles = [
+            (x, y)
+            for y in self._tile_positions(height, tile_size, overlap)
+            for x in self._tile_positions(width, tile_size, overlap)
+        ]
+        print(f"Refining {width}x{height} in {len(tiles)} tiles of {tile_size}px")
+
+        img2img = self._img2img_pipeline()
+        prompt_inputs = self._prompt_inputs([prompt], [negative_prompt])
+        output = base.convert("RGB").resize((width, height), Image.LANCZOS)
+
+        with self._pipe_lock, PeakRSSSampler() as sampler:
+            self._apply_memory_level()
+            with self._vae_tiling():
+                for index, (x, y) in enumerate(tiles):
+                    box = (x, y, x + tile_size, y + tile_size)
+                    generator = torch.Generator(device=self.device).manual_seed(
+                        seed + 1 + index
+                    )
+                    # The source already holds refined neighbours in the overlap
+                    with torch.inference_mode():
+                        tile = img2img(
+                            **prompt_inputs,
+                            image=output.crop(box),
+                            strength=strength,
+                            num_inference_steps=refine_steps,
+                            guidance_scale=guidance_scale,
+                            generator=generator,
+                        ).images[0]
+
+                    mask = self._feather_mask(tile_size, overlap, x > 0, y > 0)
+                    output.paste(tile, box[:2], mask)
+                    print(f"Tile {index + 1}/{len(tiles)} done")
+
+        output.save(path)
+        if self.cache is not None:
+            self.cache.put(key, output)
+
+        self.last_render_stats = {
+            "images": 1,
+            "rendered": 1,
+            "tiles": len(tiles),
+            "budget_mb": self.memory_budget_mb,
+            "start_rss_mb": round_mb(sampler.start_mb),
+            "peak_rss_mb": round_mb(sampler.peak_mb),
+            "memory_level": self.memory_level,
+        }
+        print(f"High-resolution render saved: {path}")
+        if sampler.peak_mb is not None:
+            print(f"Peak RSS during tiles: {sampler.peak_mb:.0f} MB")
+
+        return output, path
+
+    def generate_renders(
+        self, requests: List[Dict], output_dir: str = "outputs/renders"
+    ) -> List[Tuple[Image.Image, str]]:
+        """
+        Render several designs, batching compatible ones into one pipeline call.
+
+        Each request is a dict with the generate_render arguments (style, space,
+        specification, colors, filename, num_inference_steps, guidance_scale,
+        seed, height, width, output_dir) plus optional num_images for seeded
+        variants (seed, seed + 1, ...) and preview. Requests with the same
+        steps, guidance and resolution share a batch, capped by the memory
+        budget.
+
+        Returns one (image, path) per image, in request order.
+        """
+        jobs = []
+        for request in requests:
+            jobs.extend(self._expand_request(request, output_dir))
+
+        results: List[Optional[Tuple[Image.Image, str]]] = [None] * len(jobs)
+        groups: Dict[Tuple, List[int]] = {}
+
+        for index, job in enumerate(jobs):
+            cached_path = self.cache.get(job["key"]) if self.cache is not None else None
+            if cached_path is not None:
+                print(f"Render cache hit: {job['key'][:16]}")
+                results[index] = (
+                    self._load_cached(cached_path, job["path"]),
+                    job["path"],
+                )
+            else:
+                groups.setdefault(job["group"], []).append(index)
+
+        stats = {
+            "images": len(jobs),
+            "rendered": 0,
+            "budget_mb": self.memory_budget_mb,
+            "start_rss_mb": round_mb(current_rss_mb()),
+            "peak_rss_mb": None,
+            "memory_level": self.memory_level,
+        }
+
+        for (steps, guidance, height, width, _), indices in groups.items():
+            with self._pipe_lock:
+                batch_size = self._max_batch_images(height, width)
+                if self.memory_budget_mb is not None:
+                    batch_size = self._apply_memory_budget(height, width, batch_size)
+                stats["memory_level"] = self.memory_level
+
+                for start in range(0, len(indices), batch_size):
+                    chunk = indices[start : start + batch_size]
+                    print(
+                        f"Rendering batch of {len(chunk)} image(s) at {width}x{height}"
+                    )
+
+                    with PeakRSSSampler() as sampler:
+                        images = self._run_pipeline(
+                            [jobs[i] for i in chunk], steps, guidance, height, width
+                        )
+                    stats["rendered"] += len(chunk)
+                    if sampler.peak_mb is not None:
+                        stats["peak_rss_mb"] = round(
+                            max(stats["peak_rss_mb"] or 0.0, sampler.peak_mb), 1
+                        )
+
+                    for index, image in zip(chunk, images):
+                        job = jobs[index]
+                        image.save(job["path"])
+                        if self.cache is not None:
+                            self.cache.put(job["key"], image)
+                        print(f"Render saved: {job['path']}")
+                        results[index] = (image, job["path"])
+
+        if stats["peak_rss_mb"] is not None:
+            budget = ""
+            if self.memory_budget_mb is not None:
+                budget = f"budget {self.memory_budget_mb:.0f} MB, "
+            print(
+                f"Peak RSS: {stats['peak_rss_mb']:.0f} MB "
+                f"({budget}memory controls: {stats['memory_level']})"
+            )
+        self.last_render_stats = stats
+
+        return results
+
+    def _expand_request(self, request: Dict, output_dir: str) -> List[Dict]:
+        """Turn one render request into one job per image."""
+        style = request["style"]
+        space = request["space"]
+        steps = request.get("num_inference_steps") or self.default_steps
+        guidance = request.get("guidance_scale", 7.5)
+        num_images = request.get("num_images", 1)
+        final_size = self._check_size(
+            request.get("height") or self.height, request.get("width") or self.width
+        )
+        height, width = final_size
+
+        preview_factor = 1
+        if request.get("preview"):
+            preview_factor = PREVIEW_FACTOR
+            steps = request.get("num_inference_steps") or min(
+                PREVIEW_STEPS, self.default_steps
+            )
+            # Whole latent pixels only, so the pooled noise lines up
+            unit = self.pipe.vae_scale_factor * preview_factor
+            height = final_size[0] // unit * self.pipe.vae_scale_factor
+            width = final_size[1] // unit * self.pipe.vae_scale_factor
+
+        request_dir = request.get("output_dir", output_dir)
+        os.makedirs(request_dir, exist_ok=True)
+
+        prompt, negative_prompt = self._build_prompt(
+            style, space, request.get("specification", ""), request.get("colors")
+        )
+
+        # Unseeded renders get a random seed so the result is still reproducible
+        seed = request.get("seed")
+        if seed is None:
+            seed = secrets.randbelow(2**31)
 
-        print(f"\nGenerating render: {style} {space}")
+        print(f"\nGenerating render: {style} {space} (seed {seed})")
         print(f"Prompt: {prompt[:100]}...")
 
-        with torch.inference_mode():
-            image = self.pipe(
+        jobs = []
+        for variant in range(num_images):
+            image_seed = seed + variant
+            key = RenderCache.make_key(
                 prompt=prompt,
                 negative_prompt=negative_prompt,
-                num_inference_steps=num_inference_steps,
-                guidance_scale=guidance_scale,
-                height=768,
-                width=768,
-            ).images[0]
+                steps=steps,
+                guidance=guidance,
+                height=height,
+                width=width,
+                seed=image_seed,
+                model_id=self._cache_model_id,
+                scheduler=self.scheduler_name,
+                **({"preview_of": final_size} if preview_factor > 1 else {}),
+            )
 
-        if filename is None:
-            filename = f"{style}_{space}_render.png"
+            filename = request.get("filename")
+            if filename is None:
+                filename = f"{style}_{space}_{key[:16]}.png"
+            elif num_images > 1:
+                root, ext = os.path.splitext(filename)
+                filename = f"{root}_v{variant + 1}{ext}"
+
+            jobs.append(
+                {
+                    "prompt": prompt,
+                    "negative_prompt": negative_prompt,
+                    "seed": image_seed,
+                    "key": key,
+                    "path": os.path.join(request_dir, filename),
+                    "final_size": final_size,
+                    "preview_factor": preview_factor,
+                    "group": (steps, guidance, height, width, preview_factor),
+                }
+            )
+
+        return jobs
+
+    def _run_pipeline(
+        self, jobs: List[Dict], steps: int, guidance: float, height: int, width: int
+    ) -> List[Image.Image]:
+        prompts = [job["prompt"] for job in jobs]
+        negative_prompts = [job["negative_prompt"] for job in jobs]
+
+        # Variants of the same prompt go through num_images_per_prompt
+        # when every prompt in the batch repeats the same number of times
+        runs: List[int] = []
+        for index, prompt in enumerate(prompts):
+            if index > 0 and prompt == prompts[index - 1]:
+                runs[-1] += 1
+            else:
+                runs.append(1)
+
+        images_per_prompt = 1
+        if len(set(runs)) == 1 and runs[0] > 1:
+            images_per_prompt = runs[0]
+            prompts = prompts[::images_per_prompt]
+            negative_prompts = negative_prompts[::images_per_prompt]
+
+        generators = [
+            torch.Generator(device=self.device).manual_seed(job["seed"]) for job in jobs
+        ]
+
+        prompt_inputs = self._prompt_inputs(prompts, negative_prompts)
+
+        # Previews start from the final render's noise, downsampled
+        if jobs[0]["preview_factor"] > 1:
+            prompt_inputs["latents"] = torch.cat(
+                [self._preview_latents(job) for job in jobs]
+            )
+
+        if self.step_callback is not None:
+            prompt_inputs["callback_on_step_end"] = self._on_step_end
+
+        self._apply_memory_level()
+        with torch.inference_mode():
+            return self.pipe(
+                **prompt_inputs,
+                num_images_per_prompt=images_per_prompt,
+                num_inference_steps=steps,
+                guidance_scale=guidance,
+                height=height,
+                width=width,
+                generator=generators,
+            ).images
+
+    def _on_step_end(
+        self, pipe: Any, step: int, timestep: Any, callback_kwargs: Dict
+    ) -> Dict:
+        self.step_callback(step)
+        return callback_kwargs
 
-        output_path = os.path.join(output_dir, filename)
-        image.save(output_path)
+    def _img2img_pipeline(self) -> Any:
+        """img2img pipeline over this generator's modules and scheduler."""
+        if self.backend == "stub":
+            # The stub pipeline takes image/strength itself
+            return self.pipe
 
-        print(f"Render saved: {output_path}")
+        from diffusers import (  # type: ignore[import-not-found]
+            StableDiffusionImg2ImgPipeline,
+        )
+
+        return StableDiffusionImg2ImgPipeline(
+            **self.pipe.components, requires_safety_checker=False
+        )
+
+    @contextlib.contextmanager
+    def _vae_tiling(self) -> Iterator[None]:
+        """Tiled VAE encode/decode for the duration of a high-res pass."""
+        was_tiling = getattr(self.pipe.vae, "use_tiling", False)
+        self.pipe.vae.enable_tiling()
+        try:
+            yield
+        finally:
+            if not was_tiling:
+                self.pipe.vae.disable_tiling()
+
+    @staticmethod
+    def _highres_size(
+        base_size: Tuple[int, int], target_size: int, tile_size: int
+    ) -> Tuple[int, int]:
+        """Output size with the base aspect ratio and long side target_size."""
+        scale = target_size / max(base_size)
+        return tuple(
+            max(tile_size, int(round(side * scale / 8)) * 8) for side in base_size
+        )
+
+    @staticmethod
+    def _tile_positions(length: int, tile_size: int, overlap: int) -> List[int]:
+        # The last tile is aligned to the far edge
+        positions = list(range(0, length - tile_size, tile_size - overlap))
+        return positions + [length - tile_size]
+
+    @staticmethod
+    def _feather_mask(
+        tile_size: int, overlap: int, left: bool, top: bool
+    ) -> Image.Image:
+        """Paste mask fading in over the edges shared with earlier tiles."""
+        mask = np.ones((tile_size, tile_size), dtype=np.float32)
+        ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+        if left:
+            mask[:, :overlap] *= ramp[None, :]
+        if top:
+            mask[:overlap, :] *= ramp[:, None]
+        return Image.fromarray((mask * 255).astype(np.uint8), mode="L")
+
+    def _prompt_inputs(self, prompts: List[str], negative_prompts: List[str]) -> Dict:
+        """Pipeline prompt arguments, as cached embeddings when available."""
+        if self.embedding_cache is None:
+            return {"prompt": prompts, "negative_prompt": negative_prompts}
+
+        return {
+            "prompt_embeds": torch.cat([self._prompt_embeds(p) for p in prompts]),
+            "negative_prompt_embeds": torch.cat(
+                [self._prompt_embeds(p) for p in negative_prompts]
+            ),
+        }
+
+    def _preview_latents(self, job: Dict) -> torch.Tensor:
+        """
+        The initial noise the full-size render with this seed would use,
+        average-pooled to preview size. Pooling keeps the low-frequency layout;
+        scaling by the factor restores unit variance.
+        """
+        height, width = job["final_size"]
+        scale = self.pipe.vae_scale_factor
+        shape = (1, self.pipe.unet.config.in_channels, height // scale, width // scale)
+
+        generator = torch.Generator(device=self.device).manual_seed(job["seed"])
+        noise = torch.randn(
+            shape, generator=generator, device=self.device, dtype=self.pipe.unet.dtype
+        )
+
+        factor = job["preview_factor"]
+        return F.avg_pool2d(noise, factor) * factor
+
+    @staticmethod
+    def _check_size(height: int, width: int) -> Tuple[int, int]:
+        if height % 8 or width % 8:
+            raise ValueError(
+                f"Render size must be a multiple of 8 (got {width}x{height})"
+            )
+        return height, width
+
+    def _prompt_embeds(self, prompt: str) -> torch.Tensor:
+        """CLIP embedding of one prompt, from the embedding cache if possible."""
+        key = (self.model_id, prompt)
+        embeds = self.embedding_cache.get(key)
+        if embeds is None:
+            with self._pipe_lock, torch.inference_mode():
+                embeds, _ = self.pipe.encode_prompt(
+                    prompt,
+                    device=self.device,
+                    num_images_per_prompt=1,
+                    do_classifier_free_guidance=False,
+                )
+            self.embedding_cache.set(key, embeds)
+        return embeds
+
+    def _apply_memory_budget(self, height: int, width: int, batch_size: int) -> int:
+        """
+        Pick the cheapest memory controls that keep this resolution under the
+        RSS budget, given what the process already uses, and cap the batch.
+        """
+        rss_mb = current_rss_mb()
+        if rss_mb is None:
+            print("Warning: RSS unknown on this platform, memory budget ignored")
+            return batch_size
+
+        per_image_mb = IMAGE_MEMORY_MB_512 * (height * width) / (512 * 512)
+        headroom_mb = self.memory_budget_mb - rss_mb
+
+        level, fitting = choose_memory_level(headroom_mb, per_image_mb, self.device)
+        if fitting == 0:
+            print(
+                f"Warning: ~{headroom_mb:.0f} MB left under the memory budget; "
+                f"a {width}x{height} render may exceed it"
+            )
+            fitting = 1
+
+        self._set_memory_level(level)
+        return min(batch_size, fitting)
+
+    def _set_memory_level(self, level: str) -> None:
+        """Use the memory controls of level (and below) from now on."""
+        if level != self.memory_level:
+            print(f"Memory controls: {level}")
+            self.memory_level = level
+        self._apply_memory_level()
+
+    def _apply_memory_level(self) -> None:
+        """
+        Put this generator's memory controls on the modules. They are shared
+        with other generators, which may have set their own level, so this
+        runs under the pipeline lock before every pipeline call.
+        """
+        rank = MEMORY_LEVELS.index(self.memory_level)
+        # Attention slicing always stays on for CUDA
+        if rank >= 1 or self.device == "cuda":
+            self.pipe.enable_attention_slicing()
+        else:
+            self.pipe.disable_attention_slicing()
+
+        if rank >= 2:
+            self.pipe.vae.enable_slicing()
+        else:
+            self.pipe.vae.disable_slicing()
+
+        if rank >= 3:
+            self.pipe.vae.enable_tiling()
+        else:
+            self.pipe.vae.disable_tiling()
+
+        # Offloading hooks cannot be removed, so this level is kept once set
+        if rank >= 4 and self.device == "cuda":
+            self.pipe.enable_sequential_cpu_offload()
+
+    def _max_batch_images(self, height: int, width: int) -> int:
+        """How many images fit in one pipeline call under the memory budget."""
+        per_image_mb = IMAGE_MEMORY_MB_512 * (height * width) / (512 * 512)
+        if self.device == "cuda":
+            per_image_mb /= 2
+        return max(1, int(self.batch_memory_mb // per_image_mb))
 
-        return image, output_path
+    def _load_cached(self, cached_path: str, output_path: str) -> Image.Image:
+        if os.path.abspath(cached_path) != os.path.abspath(output_path):
+            shutil.copyfile(cached_path, output_path)
+        image = Image.open(output_path)
+        image.load()
+        return image
 
     def generate_from_spec_file(
         self,
@@ -118,6 +822,7 @@ class RenderGenerator:
         style: str,
         space: str,
         colors: Optional[List[str]] = None,
+        seed: Optional[int] = None,
     ) -> Tuple[Image.Image, str]:
         with open(spec_file_path, "r", encoding="utf-8") as f:
             specification = f.read()
@@ -125,5 +830,5 @@ class RenderGenerator:
         filename = os.path.basename(spec_file_path).replace(".txt", "_render.png")
 
         return self.generate_render(
-            style, space, specification, colors, filename=filename
+            style, space, specification, colors, filename=filename, seed=seed
         )
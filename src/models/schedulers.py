@@ -0,0 +1,44 @@
+import os
+from typing import Any, Dict
+
+# Diffusion schedulers selectable by name, each with its recommended step
+# count. "default" keeps the scheduler shipped with the model (PNDM for SD 1.5).
+SCHEDULER_PRESETS: Dict[str, Dict[str, Any]] = {
+    "default": {"class": None, "config": {}, "steps": 50},
+    "dpmpp": {
+        "class": "DPMSolverMultistepScheduler",
+        "config": {"algorithm_type": "dpmsolver++", "use_karras_sigmas": True},
+        "steps": 20,
+    },
+    "unipc": {"class": "UniPCMultistepScheduler", "config": {}, "steps": 20},
+    "euler_a": {"class": "EulerAncestralDiscreteScheduler", "config": {}, "steps": 30},
+}
+
+
+def default_scheduler_name() -> str:
+    return os.environ.get("RENDER_SCHEDULER", "default")
+
+
+def recommended_steps(name: str) -> int:
+    return SCHEDULER_PRESETS[name]["steps"]
+
+
+def make_scheduler(name: str, base_scheduler: Any) -> Any:
+    """
+    Build a fresh scheduler for preset name from the model's own scheduler
+    config (timesteps, betas, prediction type), without touching any weights.
+    """
+    if name not in SCHEDULER_PRESETS:
+        raise ValueError(
+            f"Unknown scheduler: {name} (expected one of {', '.join(SCHEDULER_PRESETS)})"
+        )
+
+    preset = SCHEDULER_PRESETS[name]
+    if preset["class"] is None:
+        scheduler_class = type(base_scheduler)
+    else:
+        import diffusers  # type: ignore[import-not-found]
+
+        scheduler_class = getattr(diffusers, preset["class"])
+
+    return scheduler_class.from_config(base_scheduler.config, **preset["config"])
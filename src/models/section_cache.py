@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+from typing import Optional, Tuple
+from models.response_cache import ResponseCache
+
+SectionKey = Tuple[str, ...]
+
+
+class SectionCache(ResponseCache):
+    """
+    LRU cache of generated specification sections.
+    Keys hold the model name plus only the inputs a section's prompt
+    depends on, e.g. (model, "installation", style) or
+    (model, "material", material_name, style), so the same text is reused
+    across requests. Entries never expire; when a path
+    is set the cache is loaded from and saved to a JSON file.
+    """
+
+    def __init__(
+        self, max_entries: Optional[int] = None, path: Optional[str] = None
+    ) -> None:
+        if max_entries is None:
+            max_entries = int(os.environ.get("SECTION_CACHE_SIZE", "2048"))
+        if path is None:
+            path = os.environ.get("SECTION_CACHE_PATH") or None
+
+        super().__init__(max_entries=max_entries, ttl_seconds=None)
+        self.path = path
+        self._save_lock = threading.Lock()
+
+        if self.path and os.path.exists(self.path):
+            self.load(self.path)
+
+    def load(self, path: str) -> int:
+        """Add the entries of a saved cache file; returns how many were read."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load section cache {path}: {e}")
+            return 0
+
+        for key, value in entries:
+            self.set(tuple(key), value)
+
+        print(f"Section cache loaded: {len(entries)} entries from {path}")
+        return len(entries)
+
+    def save(self, path: Optional[str] = None) -> Optional[str]:
+        """Write the cache (oldest first) to path or self.path."""
+        path = path or self.path
+        if not path:
+            return None
+
+        with self._lock:
+            entries = [[list(key), value] for key, (_, value) in self._entries.items()]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._save_lock:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+        return path
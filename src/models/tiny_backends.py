@@ -0,0 +1,352 @@
+"""
+Download-free model backends for CI, laptops and load tests.
+
+"tiny" builds randomly initialized T5 and Stable Diffusion (UNet/VAE/CLIP)
+models from small local configs. They run the real transformers/diffusers
+code paths in milliseconds; a fixed init seed gives every build the same
+weights (outputs are meaningless, and sampling follows the global RNG).
+
+"stub" skips the networks entirely: generate() and the pipeline call sleep
+for a configurable time (STUB_LATENCY_MS per call, STUB_STEP_LATENCY_MS per
+token or denoising step) and return deterministic canned output. Use it to
+load-test the API, batching, caches and the render job queue.
+"""
+
+import os
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+# Seed for the tiny models' random init, independent of the global RNG
+TINY_INIT_SEED = 0
+
+STUB_TEXT = "Respuesta simulada del modelo para pruebas de carga"
+
+
+def stub_latency() -> Tuple[float, float]:
+    """(per call, per token/step) artificial latency in seconds."""
+    return (
+        float(os.environ.get("STUB_LATENCY_MS", "50")) / 1000,
+        float(os.environ.get("STUB_STEP_LATENCY_MS", "0")) / 1000,
+    )
+
+
+def build_byte_tokenizer(model_max_length: int = 512) -> Any:
+    """Byte-level tokenizer: no vocabulary files, any text round-trips."""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {"<pad>": 0, "</s>": 1, "<unk>": 2}
+    for char in sorted(pre_tokenizers.ByteLevel.alphabet()):
+        vocab[char] = len(vocab)
+
+    tokenizer = Tokenizer(models.BPE(vocab=vocab, merges=[], unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        pad_token="<pad>",
+        eos_token="</s>",
+        unk_token="<unk>",
+        model_max_length=model_max_length,
+        model_input_names=["input_ids", "attention_mask"],
+    )
+
+
+def build_tiny_seq2seq() -> Tuple[Any, Any]:
+    """Byte tokenizer plus a 2-layer, 32-wide T5."""
+    import torch
+    from transformers import T5Config, T5ForConditionalGeneration
+
+    tokenizer = build_byte_tokenizer()
+    config = T5Config(
+        vocab_size=len(tokenizer),
+        d_model=32,
+        d_ff=64,
+        d_kv=8,
+        num_heads=2,
+        num_layers=2,
+        decoder_start_token_id=tokenizer.pad_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+
+    with torch.random.fork_rng(devices=[]):
+        torch.manual_seed(TINY_INIT_SEED)
+        model = T5ForConditionalGeneration(config)
+
+    return tokenizer, model
+
+
+class StubSeq2SeqModel:
+    """
+    Stands in for a seq2seq model's generate(). Returns STUB_TEXT tagged
+    with a hash of the prompt, cut to max_length tokens, after sleeping.
+    One call covers the whole batch, like a real batched generate().
+    Streaming stops early once stopping_criteria says so.
+    """
+
+    def __init__(self, tokenizer: Any) -> None:
+        self.tokenizer = tokenizer
+
+    def to(self, device: Any) -> "StubSeq2SeqModel":
+        return self
+
+    def eval(self) -> "StubSeq2SeqModel":
+        return self
+
+    def generate(
+        self,
+        input_ids: Any,
+        attention_mask: Any = None,
+        max_length: int = 20,
+        max_new_tokens: Optional[int] = None,
+        streamer: Any = None,
+        stopping_criteria: Any = None,
+        **generate_kwargs: Any,
+    ) -> Any:
+        import torch
+
+        call_latency, token_latency = stub_latency()
+        time.sleep(call_latency)
+
+        limit = max_new_tokens or max_length
+        pad_id = self.tokenizer.pad_token_id
+        rows: List[List[int]] = []
+        for ids in input_ids.tolist():
+            tag = zlib.crc32(repr([i for i in ids if i != pad_id]).encode()) % 10000
+            text_ids = self.tokenizer(f"{STUB_TEXT} #{tag}")["input_ids"]
+            # Like T5: decoder start token, the text, then end of sequence
+            rows.append(
+                ([pad_id] + text_ids)[: limit - 1] + [self.tokenizer.eos_token_id]
+            )
+
+        if streamer is not None:
+            streamer.put(torch.tensor([rows[0][:1]]))
+            for length in range(2, len(rows[0]) + 1):
+                time.sleep(token_latency)
+                streamer.put(torch.tensor([rows[0][length - 1]]))
+                if stopping_criteria is not None and bool(
+                    stopping_criteria(torch.tensor([rows[0][:length]]), None).all()
+                ):
+                    break
+            streamer.end()
+        else:
+            time.sleep(token_latency * max(len(row) for row in rows))
+
+        width = max(len(row) for row in rows)
+        return torch.tensor([row + [pad_id] * (width - len(row)) for row in rows])
+
+
+def build_stub_seq2seq() -> Tuple[Any, Any]:
+    tokenizer = build_byte_tokenizer()
+    return tokenizer, StubSeq2SeqModel(tokenizer)
+
+
+def _sd15_scheduler() -> Any:
+    from diffusers import PNDMScheduler  # type: ignore[import-not-found]
+
+    # Same schedule as SD 1.5's scheduler_config.json
+    return PNDMScheduler(
+        beta_start=0.00085,
+        beta_end=0.012,
+        beta_schedule="scaled_linear",
+        num_train_timesteps=1000,
+        set_alpha_to_one=False,
+        skip_prk_steps=True,
+        steps_offset=1,
+    )
+
+
+def build_tiny_diffusion() -> Any:
+    """
+    StableDiffusionPipeline with a tiny UNet, CLIP text encoder and a VAE
+    that keeps SD's 8x latent downscale, so render sizes behave as usual.
+    """
+    import torch
+    from diffusers import (  # type: ignore[import-not-found]
+        AutoencoderKL,
+        StableDiffusionPipeline,
+        UNet2DConditionModel,
+    )
+    from transformers import CLIPTextConfig, CLIPTextModel
+
+    tokenizer = build_byte_tokenizer(model_max_length=77)
+
+    with torch.random.fork_rng(devices=[]):
+        torch.manual_seed(TINY_INIT_SEED)
+        unet = UNet2DConditionModel(
+            sample_size=64,
+            in_channels=4,
+            out_channels=4,
+            block_out_channels=(32, 64),
+            layers_per_block=1,
+            down_block_types=("DownBlock2D", "CrossAttnDownBlock2D"),
+            up_block_types=("CrossAttnUpBlock2D", "UpBlock2D"),
+            cross_attention_dim=32,
+            norm_num_groups=32,
+        )
+        vae = AutoencoderKL(
+            in_channels=3,
+            out_channels=3,
+            latent_channels=4,
+            block_out_channels=(16, 16, 16, 16),
+            down_block_types=("DownEncoderBlock2D",) * 4,
+            up_block_types=("UpDecoderBlock2D",) * 4,
+            layers_per_block=1,
+            norm_num_groups=8,
+        )
+        text_encoder = CLIPTextModel(
+            CLIPTextConfig(
+                vocab_size=len(tokenizer),
+                hidden_size=32,
+                intermediate_size=37,
+                num_attention_heads=4,
+                num_hidden_layers=2,
+                max_position_embeddings=77,
+                pad_token_id=tokenizer.pad_token_id,
+                bos_token_id=tokenizer.pad_token_id,
+                eos_token_id=2,
+            )
+        )
+
+    return StableDiffusionPipeline(
+        unet=unet,
+        vae=vae,
+        text_encoder=text_encoder,
+        tokenizer=tokenizer,
+        scheduler=_sd15_scheduler(),
+        safety_checker=None,
+        feature_extractor=None,
+        requires_safety_checker=False,
+    )
+
+
+class _StubVAE:
+    """Keeps the memory control flags RenderGenerator toggles, like AutoencoderKL."""
+
+    def __init__(self) -> None:
+        self.use_slicing = False
+        self.use_tiling = False
+
+    def enable_slicing(self) -> None:
+        self.use_slicing = True
+
+    def disable_slicing(self) -> None:
+        self.use_slicing = False
+
+    def enable_tiling(self) -> None:
+        self.use_tiling = True
+
+    def disable_tiling(self) -> None:
+        self.use_tiling = False
+
+
+class _StubUNet:
+    """Config and dtype that preview latents are shaped from."""
+
+    def __init__(self) -> None:
+        import torch
+
+        self.config = SimpleNamespace(in_channels=4)
+        self.dtype = torch.float32
+
+
+class _StubOutput:
+    def __init__(self, images: List[Any]) -> None:
+        self.images = images
+
+
+class StubDiffusionPipeline:
+    """
+    Stands in for StableDiffusionPipeline (and its img2img variant).
+    Sleeps per step, calls callback_on_step_end, and returns seeded
+    blocky noise images of the requested size.
+    """
+
+    vae_scale_factor = 8
+
+    def __init__(
+        self,
+        scheduler: Any = None,
+        vae: Any = None,
+        unet: Any = None,
+        requires_safety_checker: bool = False,
+        **components: Any,
+    ) -> None:
+        self.scheduler = scheduler if scheduler is not None else _sd15_scheduler()
+        self.vae = vae if vae is not None else _StubVAE()
+        self.unet = unet if unet is not None else _StubUNet()
+        self.text_encoder = None
+
+    @property
+    def components(self) -> Dict[str, Any]:
+        return {"scheduler": self.scheduler, "vae": self.vae, "unet": self.unet}
+
+    def to(self, device: Any) -> "StubDiffusionPipeline":
+        return self
+
+    def enable_attention_slicing(self, *args: Any) -> None:
+        pass
+
+    def disable_attention_slicing(self) -> None:
+        pass
+
+    def enable_sequential_cpu_offload(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def __call__(
+        self,
+        prompt: Any = None,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
+        num_inference_steps: int = 50,
+        num_images_per_prompt: int = 1,
+        generator: Any = None,
+        image: Any = None,
+        strength: float = 1.0,
+        callback_on_step_end: Any = None,
+        **kwargs: Any,
+    ) -> _StubOutput:
+        import torch
+        from PIL import Image
+
+        if image is not None:
+            # img2img: same size as the source, fewer effective steps
+            width, height = image.size
+            num_inference_steps = max(1, int(num_inference_steps * strength))
+        height, width = height or 512, width or 512
+
+        prompts = [prompt] if isinstance(prompt, str) or prompt is None else prompt
+        count = len(prompts) * num_images_per_prompt
+        generators = generator if isinstance(generator, list) else [generator] * count
+
+        call_latency, step_latency = stub_latency()
+        time.sleep(call_latency)
+        for step in range(num_inference_steps):
+            time.sleep(step_latency)
+            if callback_on_step_end is not None:
+                callback_on_step_end(self, step, step, {})
+
+        images = []
+        latent_size = (
+            height // self.vae_scale_factor,
+            width // self.vae_scale_factor,
+            3,
+        )
+        for index in range(count):
+            device = generators[index].device if generators[index] else "cpu"
+            pixels = torch.rand(latent_size, generator=generators[index], device=device)
+            pixels = (pixels * 255).to(torch.uint8).cpu().numpy()
+            images.append(
+                Image.fromarray(pixels, mode="RGB").resize(
+                    (width, height), Image.NEAREST
+                )
+            )
+        return _StubOutput(images)
+
+
+def build_stub_diffusion() -> StubDiffusionPipeline:
+    return StubDiffusionPipeline()
@@ -0,0 +1,57 @@
+"""
+Batch mode: manifest ids and per-item state on the stub backend.
+
+    python -m pytest -q test_batch_runner.py
+"""
+
+import json
+
+import pytest
+
+from batch_runner import load_manifest, run_batch
+
+
+def write_manifest(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+DESIGN = {"style": "rustic", "space": "facade", "size": "medium", "colors": "grey"}
+
+
+def test_variants_get_distinct_ids(tmp_path):
+    manifest = write_manifest(
+        tmp_path / "manifest.jsonl",
+        [DESIGN, {**DESIGN, "seed": 1}, {**DESIGN, "seed": 2, "steps": 10}],
+    )
+    ids = [entry["id"] for entry in load_manifest(manifest)]
+    assert ids == [
+        "rustic_facade_medium_grey",
+        "rustic_facade_medium_grey_s1",
+        "rustic_facade_medium_grey_s2_n10",
+    ]
+
+
+def test_duplicate_ids_are_rejected(tmp_path):
+    manifest = write_manifest(
+        tmp_path / "manifest.jsonl", [{**DESIGN, "id": "a"}, {**DESIGN, "id": "a"}]
+    )
+    with pytest.raises(ValueError, match="entry 2"):
+        load_manifest(manifest)
+
+
+def test_batch_records_share_the_batch_render_time(stub_backend, tmp_path, monkeypatch):
+    monkeypatch.setenv("RENDER_CACHE_DIR", str(tmp_path / "render_cache"))
+    manifest = write_manifest(
+        tmp_path / "manifest.jsonl",
+        [{**DESIGN, "seed": seed, "steps": 2} for seed in range(3)],
+    )
+
+    summary = run_batch(manifest, output_dir=str(tmp_path / "out"), height=64, width=64)
+
+    assert summary["done"] == 3 and summary["failed"] == 0
+    records = summary["items"]
+    assert len({r["render_path"] for r in records}) == 3
+    assert {r["render_batch"] for r in records} == {3}
+    assert len({r["batch_render_seconds"] for r in records}) == 1
+    assert all("render_seconds" not in r for r in records)
@@ -0,0 +1,29 @@
+"""
+Catalog index: groups, category order and the precomputed lookups.
+
+    python -m pytest -q test_catalog_index.py
+"""
+
+from models.catalog_index import CATEGORY_GROUPS, load_catalog_index
+
+
+def test_catalog_index():
+    index = load_catalog_index()
+    assert load_catalog_index() is index
+
+    for category, groups in CATEGORY_GROUPS.items():
+        grouped = []
+        for group in groups:
+            for material in index.group(category, group):
+                record = index.record(material)
+                assert (record.category, record.group) == (category, group)
+                grouped.append(material)
+        assert grouped and list(index.category(category)) == grouped
+
+    for material in index.low_absorption("bathroom_finishes", "ceramics"):
+        assert index.record(material).water_absorption < 1.0
+
+    grey = index.by_color("Grey")
+    assert grey and all(
+        any("grey" in color for color in index.record(m).colors) for m in grey
+    )
@@ -0,0 +1,79 @@
+"""
+Micro-batching of concurrent generate() calls, on the stub seq2seq model.
+
+    python -m pytest -q test_generation_batcher.py
+"""
+
+import pytest
+
+from models.generation_batcher import GenerationBatcher
+from models.tiny_backends import StubSeq2SeqModel, build_byte_tokenizer
+
+
+class CountingStubModel(StubSeq2SeqModel):
+    """Records the batch size of every generate() call."""
+
+    def __init__(self, tokenizer):
+        super().__init__(tokenizer)
+        self.batches = []
+
+    def generate(self, input_ids, **kwargs):
+        self.batches.append(len(input_ids))
+        if kwargs.get("max_length") == 0:
+            raise ValueError("max_length must be positive")
+        return super().generate(input_ids, **kwargs)
+
+
+@pytest.fixture
+def batcher(stub_backend):
+    tokenizer = build_byte_tokenizer()
+    batcher = GenerationBatcher(
+        tokenizer, CountingStubModel(tokenizer), "cpu", window_ms=200
+    )
+    yield batcher
+    batcher.close()
+
+
+def test_batcher_groups_by_generation_settings(batcher):
+    # Long enough for the stub's per-prompt tag
+    futures = [batcher.submit(f"prompt {i}", max_length=64) for i in range(3)]
+    futures.append(batcher.submit("other settings", max_length=10))
+
+    texts = [future.result(timeout=10) for future in futures]
+
+    assert sorted(batcher.model.batches) == [1, 3]
+    assert len(set(texts[:3])) == 3  # each caller gets its own output
+
+
+def test_batcher_fails_only_the_bad_request(batcher):
+    unhashable = batcher.submit("bad kwargs", bad_words_ids=[[1]])
+    failing = batcher.submit("fails in generate", max_length=0)
+    good = batcher.submit("fine", max_length=20)
+
+    with pytest.raises(TypeError):
+        unhashable.result(timeout=10)
+    with pytest.raises(ValueError):
+        failing.result(timeout=10)
+    assert good.result(timeout=10)
+
+    # The worker thread survived both
+    assert batcher.generate("still running", max_length=20)
+
+
+def test_batcher_close(stub_backend):
+    tokenizer = build_byte_tokenizer()
+    batcher = GenerationBatcher(
+        tokenizer, CountingStubModel(tokenizer), "cpu", window_ms=200
+    )
+    batcher.submit("warm", max_length=20).result(timeout=10)
+
+    # Queued behind the stop sentinel, so the worker never takes it
+    batcher._queue.put(None)
+    stranded = batcher.submit("stranded", max_length=20)
+    batcher.close()
+
+    with pytest.raises(RuntimeError):
+        stranded.result(timeout=10)
+    with pytest.raises(RuntimeError):
+        batcher.submit("too late", max_length=20)
+    batcher.close()  # closing twice is harmless
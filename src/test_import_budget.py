@@ -0,0 +1,67 @@
+"""
+Import-time budget for spec-only and API startup.
+
+Each check imports an entry point in a fresh interpreter and fails if it
+pulls in the render stack (diffusers, PIL) or torch/transformers. Wall-clock
+time depends on the machine, so it is only checked when
+IMPORT_BUDGET_SECONDS is set.
+
+    python -m pytest -q test_import_budget.py
+    IMPORT_BUDGET_SECONDS=1.5 python -m pytest -q test_import_budget.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_BUDGET_SECONDS = (
+    float(os.environ["IMPORT_BUDGET_SECONDS"])
+    if os.environ.get("IMPORT_BUDGET_SECONDS")
+    else None
+)
+HEAVY_MODULES = ["diffusers", "PIL", "torch", "transformers", "models.render_generator"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def _probe_import(module: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _check_import(module: str) -> None:
+    result = _probe_import(module)
+    assert result["heavy"] == [], f"{module} imports {', '.join(result['heavy'])}"
+    if IMPORT_BUDGET_SECONDS is not None:
+        assert result["seconds"] < IMPORT_BUDGET_SECONDS, result
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["main", "models.design_generator", "models.chat_model", "batch_runner"],
+)
+def test_spec_only_imports_stay_light(module):
+    _check_import(module)
+
+
+def test_api_import_stays_light():
+    pytest.importorskip("fastapi")
+    _check_import("api.main")
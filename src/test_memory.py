@@ -0,0 +1,51 @@
+"""
+RSS measurement and memory budgets where the RSS is unknown (no procfs,
+psutil or resource module, as on Windows without psutil).
+
+    python -m pytest -q test_memory.py
+"""
+
+import sys
+
+import pytest
+
+from models import memory
+from models.memory import PeakRSSSampler, current_rss_mb
+
+
+def test_current_rss_is_measured():
+    assert current_rss_mb() > 0
+
+
+@pytest.fixture
+def unknown_rss(monkeypatch):
+    def no_procfs(*args, **kwargs):
+        raise OSError("no procfs")
+
+    monkeypatch.setattr(memory, "open", no_procfs, raising=False)
+    monkeypatch.setitem(sys.modules, "psutil", None)
+    monkeypatch.setitem(sys.modules, "resource", None)
+
+
+def test_unknown_rss(unknown_rss):
+    assert current_rss_mb() is None
+    with PeakRSSSampler(interval=0.001) as sampler:
+        pass
+    assert (sampler.start_mb, sampler.peak_mb) == (None, None)
+
+
+def test_render_with_budget_and_unknown_rss(unknown_rss, stub_backend, tmp_path):
+    from models.render_generator import RenderGenerator
+
+    render_gen = RenderGenerator(
+        use_cache=False, height=64, width=64, memory_budget_mb=4096
+    )
+    try:
+        render_gen.generate_render(
+            "rustic", "facade", "", num_inference_steps=2, output_dir=str(tmp_path)
+        )
+    finally:
+        render_gen.close()
+    stats = render_gen.last_render_stats
+    assert stats["rendered"] == 1
+    assert (stats["start_rss_mb"], stats["peak_rss_mb"]) == (None, None)
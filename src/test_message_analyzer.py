@@ -0,0 +1,84 @@
+"""
+Keyword analyzer behaviour: accent folding, topic and space detection.
+
+    python -m pytest -q test_message_analyzer.py
+"""
+
+import pytest
+
+from models.message_analyzer import MessageAnalyzer, normalize_text
+
+TOPIC_KEYWORDS = ["baño", "ceramica", "pintura", "piso", "fachada", "piscina"]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return MessageAnalyzer(TOPIC_KEYWORDS, ["rustic", "minimalist"])
+
+
+def test_normalize_strips_vowel_accents_but_keeps_enye():
+    assert normalize_text("Cerámica Pintúra") == "ceramica pintura"
+    assert normalize_text("BAÑO diseño") == "baño diseño"
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["¿Qué opinas del transporte urbano?", "Quiero un diseño urbano"],
+)
+def test_urbano_is_not_a_bathroom(analyzer, message):
+    # "bano" (ñ folded to n) used to match inside "urbano"
+    analysis = analyzer.analyze(message)
+    assert not analysis.on_topic
+    assert not analysis.has("bathroom")
+    assert analysis.space is None
+
+
+def test_bathroom_question(analyzer):
+    analysis = analyzer.analyze("¿Qué cerámica recomiendas para el BAÑO?")
+    assert analysis.on_topic
+    assert analysis.has("bathroom")
+    assert analysis.space == "bathroom"
+
+
+def test_categories_and_styles(analyzer):
+    analysis = analyzer.analyze("Pintura para una fachada rustic")
+    assert analysis.on_topic
+    assert analysis.has("paint") and analysis.has("exterior")
+    assert analysis.style == "rustic"
+    assert not analysis.spec_request
+
+
+def test_off_topic(analyzer):
+    assert not analyzer.analyze("¿Cuál es la capital de Francia?").on_topic
+
+
+@pytest.mark.parametrize(
+    "message, style",
+    [
+        ("Diseño brutalism con toques rustic", "rustic"),
+        ("Un baño brutalism o industrial", "industrial"),
+        ("Baño minimalist pero brutalism", "brutalism"),
+        ("Baño minimalist", "minimalist"),
+        ("Un baño con ceramica blanca", None),
+    ],
+)
+def test_style_priority(message, style):
+    # rustic > industrial > brutalism, whatever the catalog order
+    analyzer = MessageAnalyzer(
+        TOPIC_KEYWORDS, ["minimalist", "brutalism", "industrial", "rustic"]
+    )
+    assert analyzer.analyze(message).style == style
+
+
+def test_chat_model_uses_analyzer_output(stub_chat_model):
+    chat = stub_chat_model
+
+    off_topic = chat.generate_response("¿Cuál es la capital de Francia?")
+    assert off_topic["on_topic"] is False
+    assert off_topic["materials_suggested"] == []
+
+    analysis = chat.analyze("¿Qué cerámica recomiendas para el baño?")
+    assert analysis.on_topic and analysis.space == "bathroom"
+    answer = chat.generate_response("¿Qué cerámica recomiendas para el baño?")
+    assert answer["on_topic"] is True
+    assert answer["materials_suggested"]
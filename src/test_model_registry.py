@@ -0,0 +1,90 @@
+"""
+Model registry: one load per key, shared by reference count.
+
+    python -m pytest -q test_model_registry.py
+"""
+
+import pytest
+
+from models.model_registry import (
+    ModelRegistry,
+    acquire_seq2seq,
+    get_registry,
+    release_seq2seq,
+    seq2seq_key,
+)
+
+MODEL = "google/flan-t5-base"
+
+
+class Closeable:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_registry_refcounts():
+    registry = ModelRegistry()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return Closeable()
+
+    first = registry.acquire("key", loader)
+    second = registry.acquire("key", loader)
+    assert first is second and len(loads) == 1
+    assert registry.stats() == {repr("key"): 2}
+
+    registry.release("key")
+    assert not first.closed
+    registry.release("key")
+    assert first.closed and registry.stats() == {}
+
+    # Unloaded keys load again on the next acquire
+    assert registry.acquire("key", loader) is not first
+    assert len(loads) == 2
+
+
+def test_registry_failed_load_is_not_kept():
+    registry = ModelRegistry()
+
+    def broken():
+        raise OSError("no weights")
+
+    with pytest.raises(OSError):
+        registry.acquire("key", broken)
+    assert registry.stats() == {}
+    assert registry.acquire("key", Closeable).closed is False
+
+
+def test_seq2seq_models_are_shared(stub_backend):
+    key = repr(seq2seq_key(MODEL, "cpu", "float32", "stub"))
+    before = get_registry().stats().get(key, 0)
+
+    first = acquire_seq2seq(MODEL, "cpu", "float32", "stub")
+    second = acquire_seq2seq(MODEL, "cpu", "float32", "stub")
+    try:
+        assert first is second
+        assert get_registry().stats()[key] == before + 2
+    finally:
+        release_seq2seq(MODEL, "cpu", "float32", "stub")
+        release_seq2seq(MODEL, "cpu", "float32", "stub")
+
+    assert get_registry().stats().get(key, 0) == before
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_int8_on_tiny_backend(tiny_backend, monkeypatch):
+    monkeypatch.setenv("SEQ2SEQ_DTYPE", "int8")
+    from models.chat_model import TerminacionesChatModel
+
+    chat = TerminacionesChatModel()
+    try:
+        assert chat.model is not None
+        assert type(chat.model.lm_head).__module__.startswith("torch.ao.")
+        assert chat.generate_response("¿Qué pintura uso para exteriores?")["response"]
+    finally:
+        chat.close()
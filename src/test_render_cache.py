@@ -0,0 +1,22 @@
+"""
+Render cache: a repeated render is served without running the pipeline.
+
+    python -m pytest -q test_render_cache.py
+"""
+
+
+def test_render_cache_hit_skips_the_pipeline(stub_render_generator, tmp_path):
+    render_gen = stub_render_generator
+    kwargs = dict(num_inference_steps=2, seed=7, output_dir=str(tmp_path / "out"))
+
+    first, _ = render_gen.generate_render("rustic", "facade", "", **kwargs)
+    assert render_gen.last_render_stats["rendered"] == 1
+
+    second, _ = render_gen.generate_render("rustic", "facade", "", **kwargs)
+    assert render_gen.last_render_stats["rendered"] == 0
+    assert second.tobytes() == first.tobytes()
+
+    # Any change to the inputs is a different entry
+    render_gen.generate_render("rustic", "facade", "", **{**kwargs, "seed": 8})
+    assert render_gen.last_render_stats["rendered"] == 1
+    assert (render_gen.cache.hits, render_gen.cache.misses) == (1, 2)
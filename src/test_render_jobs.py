@@ -0,0 +1,81 @@
+"""
+Render jobs and concurrent renders sharing one pipeline.
+
+    python -m pytest -q test_render_jobs.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from api.render_jobs import RenderJobQueue, RenderQueueFull
+
+
+def test_render_job_status_transitions():
+    started, release = threading.Event(), threading.Event()
+
+    def run_job(fail=False):
+        started.set()
+        release.wait(10)
+        if fail:
+            raise RuntimeError("boom")
+        return {"ok": True}
+
+    jobs = RenderJobQueue(run_job, workers=1, max_queue=1)
+    try:
+        first = jobs.submit()
+        assert started.wait(10)
+        second = jobs.submit(fail=True)
+
+        assert (first.status, second.status) == ("running", "queued")
+        with pytest.raises(RenderQueueFull):
+            jobs.submit()
+
+        release.set()
+        deadline = time.time() + 10
+        while second.status != "failed" and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert first.status == "done" and first.result == {"ok": True}
+        assert second.status == "failed" and second.error == "boom"
+        assert first.started_at <= first.finished_at
+        assert jobs.get(second.id) is second
+        assert jobs.stats()["done"] == 1 and jobs.stats()["failed"] == 1
+    finally:
+        release.set()
+        jobs.shutdown()
+
+
+def test_concurrent_renders_share_a_pipeline(tiny_render_generator, tmp_path):
+    # The tiny backend runs the real pipeline, fast tokenizer included
+    render_gen = tiny_render_generator
+    errors, stats = [], {}
+
+    def render(index):
+        try:
+            render_gen.generate_renders(
+                [
+                    {
+                        "style": "rustic",
+                        "space": "facade",
+                        "num_inference_steps": 2,
+                        "seed": index,
+                        "num_images": index + 1,
+                    }
+                ],
+                output_dir=str(tmp_path),
+            )
+            stats[index] = render_gen.last_render_stats
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=render, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Every thread reads the stats of its own render
+    assert {index: s["images"] for index, s in stats.items()} == {0: 1, 1: 2, 2: 3}
@@ -0,0 +1,44 @@
+"""
+Chat response cache: LRU, TTL and reuse across equivalent questions.
+
+    python -m pytest -q test_response_cache.py
+"""
+
+import time
+
+from models.response_cache import ResponseCache
+
+
+def test_response_cache_hits_misses_and_lru():
+    cache = ResponseCache(max_entries=2, ttl_seconds=None)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1)
+
+
+def test_response_cache_ttl():
+    cache = ResponseCache(max_entries=4, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_chat_response_cache(stub_chat_model):
+    chat = stub_chat_model
+    question = "¿Qué pintura uso para exteriores con mucha humedad?"
+
+    first = chat.generate_response(question)
+    # Same question up to case, accents and punctuation
+    second = chat.generate_response("que pintura uso para exteriores con mucha humedad")
+
+    assert second["response"] == first["response"]
+    stats = chat.get_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
@@ -0,0 +1,35 @@
+"""
+Section cache: reuse across specifications and persistence on disk.
+
+    python -m pytest -q test_section_cache.py
+"""
+
+from models.section_cache import SectionCache
+
+
+def test_section_cache_reuse_and_persistence(stub_design_generator):
+    design_gen = stub_design_generator
+
+    first = design_gen.generate_specification("rustic", "facade", "medium", ["grey"])
+    misses = design_gen.section_cache.misses
+    assert design_gen.section_cache.hits == 0 and misses > 0
+
+    second = design_gen.generate_specification("rustic", "facade", "medium", ["grey"])
+    assert second == first
+    assert design_gen.section_cache.hits == misses
+
+    # Requests never write the file; it is saved explicitly
+    assert len(SectionCache(path=design_gen.section_cache.path)) == 0
+    design_gen.save_section_cache()
+    reloaded = SectionCache(path=design_gen.section_cache.path)
+    assert len(reloaded) == len(design_gen.section_cache)
+
+
+def test_warm_section_cache_saves(stub_design_generator):
+    design_gen = stub_design_generator
+
+    generated = design_gen.warm_section_cache(styles=["rustic"], spaces=["facade"])
+    assert generated > 0
+    reloaded = SectionCache(path=design_gen.section_cache.path)
+    assert len(reloaded) == generated
+    assert design_gen.warm_section_cache(styles=["rustic"], spaces=["facade"]) == 0
@@ -0,0 +1,52 @@
+"""
+Startup warmup and /health/ready: ready only once FLAN-T5 actually loaded.
+
+    python -m pytest -q test_warmup.py
+"""
+
+import pytest
+
+from api.chat_handler import ChatHandler
+from api.warmup import ModelWarmup
+
+
+def run_warmup() -> ModelWarmup:
+    warmup = ModelWarmup(ChatHandler, prompts=["¿Qué pintura uso en exteriores?"])
+    warmup.start()
+    warmup.join(timeout=120)
+    if warmup.handler is not None:
+        warmup.handler.render_jobs.shutdown()
+    return warmup
+
+
+def ready_response(warmup: ModelWarmup, monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    import api.main
+
+    monkeypatch.setattr(api.main, "model_warmup", warmup)
+    return TestClient(api.main.app).get("/health/ready")
+
+
+def test_ready_on_stub_backend(stub_backend, monkeypatch):
+    warmup = run_warmup()
+
+    assert warmup.status()["status"] == "ready"
+    assert ready_response(warmup, monkeypatch).status_code == 200
+
+
+def test_not_ready_without_weights(monkeypatch, tmp_path):
+    # Real backend, empty model store and no downloads: FLAN-T5 cannot load
+    # and both models fall back to templates
+    monkeypatch.setenv("MODEL_BACKEND", "torch")
+    monkeypatch.setenv("MODEL_STORE_DIR", str(tmp_path / "model_store"))
+    monkeypatch.setenv("MODEL_STORE_REQUIRED", "1")
+    warmup = run_warmup()
+
+    status = warmup.status()
+    assert status["status"] == "failed"
+    for name in ("chat_model", "design_generator"):
+        assert status["models"][name]["state"] == "failed"
+        assert status["models"][name]["error"]
+    assert ready_response(warmup, monkeypatch).status_code == 503